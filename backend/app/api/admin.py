@@ -9,6 +9,7 @@ import logging
 from app.database import get_db
 from app.services.album_service import AlbumService
 from app.services.collection_service import CollectionService
+from app.services.track_service import invalidate_album_tracks
 from app.models.album import Album
 from app.models.track import Track
 
@@ -62,6 +63,16 @@ class CreateCollectionRequest(BaseModel):
     description: str | None = None
 
 
+class CollectionSummaryResponse(BaseModel):
+    id: str
+    name: str
+    slug: str
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
 class UpdateCollectionRequest(BaseModel):
     name: str | None = None
     slug: str | None = None
@@ -101,7 +112,7 @@ def run_library_scan(db: Session):
 
 
 @router.post("/library/scan", response_model=ScanResultResponse)
-def scan_library(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def scan_library(background_tasks: BackgroundTasks, db: Session = Depends(get_db, scope="function")):
     """Trigger a library scan to import new albums (existing albums by file_path are skipped, not updated)."""
     album_service = AlbumService(db)
     
@@ -115,7 +126,7 @@ def scan_library(background_tasks: BackgroundTasks, db: Session = Depends(get_db
 def list_all_albums(
     limit: int = 1000,
     offset: int = 0,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """List all albums in the database"""
     album_service = AlbumService(db)
@@ -124,7 +135,7 @@ def list_all_albums(
 
 
 @router.put("/albums/{album_id}")
-def update_album(album_id: str, request: UpdateAlbumRequest, db: Session = Depends(get_db)):
+def update_album(album_id: str, request: UpdateAlbumRequest, db: Session = Depends(get_db, scope="function")):
     """Update album metadata"""
     album = db.query(Album).filter(Album.id == album_id).first()
     if not album:
@@ -140,12 +151,11 @@ def update_album(album_id: str, request: UpdateAlbumRequest, db: Session = Depen
     if request.archived is not None:
         album.archived = request.archived
     
-    db.commit()
     return {"message": "Album updated", "id": album.id}
 
 
 @router.get("/albums/{album_id}")
-def get_album_details(album_id: str, db: Session = Depends(get_db)):
+def get_album_details(album_id: str, db: Session = Depends(get_db, scope="function")):
     """Get album details with tracks and collections"""
     from app.models.collection_album import CollectionAlbum
     from app.models.collection import Collection
@@ -200,7 +210,7 @@ def get_album_details(album_id: str, db: Session = Depends(get_db)):
 
 
 @router.put("/tracks/{track_id}")
-def update_track(track_id: str, request: UpdateTrackRequest, db: Session = Depends(get_db)):
+def update_track(track_id: str, request: UpdateTrackRequest, db: Session = Depends(get_db, scope="function")):
     """Update track metadata"""
     track = db.query(Track).filter(Track.id == track_id).first()
     if not track:
@@ -216,13 +226,14 @@ def update_track(track_id: str, request: UpdateTrackRequest, db: Session = Depen
         track.is_favorite = request.is_favorite
     if request.is_recommended is not None:
         track.is_recommended = request.is_recommended
+    if request.enabled is not None or request.archived is not None:
+        invalidate_album_tracks(db, track.album_id)
     
-    db.commit()
     return {"message": "Track updated", "id": track.id}
 
 
 @router.delete("/albums/{album_id}")
-def delete_album(album_id: str, db: Session = Depends(get_db)):
+def delete_album(album_id: str, db: Session = Depends(get_db, scope="function")):
     """Delete an album from the database"""
     album_service = AlbumService(db)
     
@@ -232,8 +243,15 @@ def delete_album(album_id: str, db: Session = Depends(get_db)):
     return {"message": "Album deleted"}
 
 
+@router.get("/collections", response_model=List[CollectionSummaryResponse])
+def list_collections_summary(db: Session = Depends(get_db, scope="function")):
+    """List active collections (id, name, slug, is_active only)"""
+    collection_service = CollectionService(db)
+    return collection_service.list_collections_summary()
+
+
 @router.post("/collections")
-def create_collection(request: CreateCollectionRequest, db: Session = Depends(get_db)):
+def create_collection(request: CreateCollectionRequest, db: Session = Depends(get_db, scope="function")):
     """Create a new collection"""
     collection_service = CollectionService(db)
     
@@ -257,7 +275,7 @@ def create_collection(request: CreateCollectionRequest, db: Session = Depends(ge
 def update_collection(
     collection_id: str,
     request: UpdateCollectionRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """Update a collection"""
     collection_service = CollectionService(db)
@@ -277,7 +295,7 @@ def update_collection(
 
 
 @router.delete("/collections/{collection_id}")
-def delete_collection(collection_id: str, db: Session = Depends(get_db)):
+def delete_collection(collection_id: str, db: Session = Depends(get_db, scope="function")):
     """Delete a collection"""
     # Prevent deletion of special "all" collection
     if collection_id == '00000000-0000-0000-0000-000000000000':
@@ -295,7 +313,7 @@ def delete_collection(collection_id: str, db: Session = Depends(get_db)):
 def update_collection_sections(
     collection_id: str,
     body: UpdateCollectionSectionsRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
     """Enable/disable sections and set section list (3-10 when enabled)."""
     collection_service = CollectionService(db)
@@ -315,7 +333,7 @@ def update_collection_sections(
 def update_collection_settings(
     collection_id: str,
     body: UpdateCollectionSettingsRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
     """Update default display settings for a collection (sort order, jump bar, color coding, edit mode)."""
     collection_service = CollectionService(db)
@@ -343,7 +361,7 @@ def update_collection_albums(
     album_id: str,
     action: str,  # 'add' or 'remove'
     sort_order: int = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """Add or remove an album from a collection"""
     collection_service = CollectionService(db)
@@ -372,7 +390,7 @@ def reorder_collection_albums(
     slug: str,
     album_id: str,
     new_sort_order: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """Update sort order for an album in a collection"""
     collection_service = CollectionService(db)
@@ -395,7 +413,7 @@ class SetCollectionOrderRequest(BaseModel):
 def set_collection_album_order(
     slug: str,
     body: SetCollectionOrderRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """Set full order of albums in a collection (list of album IDs in desired order)."""
     collection_service = CollectionService(db)
@@ -414,7 +432,7 @@ def set_collection_album_order(
 
 
 @router.post("/sanitize-tracks")
-def sanitize_all_track_titles(db: Session = Depends(get_db)):
+def sanitize_all_track_titles(db: Session = Depends(get_db, scope="function")):
     """
     Sanitize all track titles in the database by removing remaster annotations
     
@@ -435,9 +453,6 @@ def sanitize_all_track_titles(db: Session = Depends(get_db)):
             track.title = sanitized_title
             updated_count += 1
             logger.info(f"Sanitized: '{original_title}' -> '{sanitized_title}'")
-    
-    db.commit()
-    
     return {
         "message": f"Sanitized {updated_count} track titles",
         "total_tracks": len(tracks),
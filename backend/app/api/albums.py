@@ -49,7 +49,7 @@ class AlbumDetailResponse(AlbumResponse):
 def get_album(
     album_id: str,
     collection: Optional[str] = Query(None, description="Filter tracks by collection"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """Get album details with tracks"""
     album_service = AlbumService(db)
@@ -70,10 +70,10 @@ def get_album(
         if collection_obj:
             # Get collection albums to find enabled tracks
             albums_data = collection_service.get_collection_albums(collection_obj.id, include_tracks=True)
-            album_data = next((a for a in albums_data if a['id'] == album_id), None)
+            album_data = next((a for a in albums_data if a.id == album_id), None)
             
-            if album_data and 'tracks' in album_data:
-                enabled_track_ids = {t['id'] for t in album_data['tracks']}
+            if album_data and album_data.tracks is not None:
+                enabled_track_ids = {t.id for t in album_data.tracks}
                 tracks = [t for t in tracks if t.id in enabled_track_ids]
     
     return {
@@ -89,7 +89,7 @@ def get_album(
 
 
 @router.get("/{album_id}/tracks", response_model=List[TrackResponse])
-def get_album_tracks(album_id: str, db: Session = Depends(get_db)):
+def get_album_tracks(album_id: str, db: Session = Depends(get_db, scope="function")):
     """Get tracks for an album"""
     track_service = TrackService(db)
     tracks = track_service.get_tracks_by_album(album_id)
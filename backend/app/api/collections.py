@@ -1,8 +1,10 @@
 """Collections API endpoints"""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import List, Any, Iterable, Iterator
 from pydantic import BaseModel
+import msgspec
 
 from app.database import get_db
 from app.services.collection_service import CollectionService
@@ -41,13 +43,23 @@ class AlbumInCollectionResponse(BaseModel):
     has_multi_disc: bool
 
 
+def _stream_json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    """Encode items as a JSON array one element at a time"""
+    encoder = msgspec.json.Encoder()
+    yield b"["
+    for index, item in enumerate(items):
+        yield (b"," if index else b"") + encoder.encode(item)
+    yield b"]"
+
+
 @router.get("", response_model=List[CollectionResponse])
-def list_collections(db: Session = Depends(get_db)):
+def list_collections(db: Session = Depends(get_db, scope="function")):
     """List all active collections (includes special 'all' collection)"""
     service = CollectionService(db)
-    collections = service.get_all_collections()
+    collections = [CollectionResponse.model_validate(c) for c in service.get_all_collections()]
     
-    # Update "all" collection description with current album count (excluding archived)
+    # Update "all" collection description with current album count (excluding archived);
+    # set on the response only so the request transaction does not persist it
     for collection in collections:
         if collection.slug == 'all':
             from app.services.album_service import AlbumService
@@ -60,7 +72,7 @@ def list_collections(db: Session = Depends(get_db)):
 
 
 @router.get("/{slug}", response_model=CollectionResponse)
-def get_collection(slug: str, db: Session = Depends(get_db)):
+def get_collection(slug: str, db: Session = Depends(get_db, scope="function")):
     """Get collection by slug"""
     service = CollectionService(db)
     collection = service.get_collection_by_slug(slug)
@@ -101,5 +113,5 @@ def get_collection_albums(slug: str, db: Session = Depends(get_db)):
     if not collection:
         raise HTTPException(status_code=404, detail=f"Collection '{slug}' not found")
     
-    albums = service.get_collection_albums(collection.id, include_tracks=False)
-    return albums
+    albums = service.iter_collection_albums(collection.id, include_tracks=False)
+    return StreamingResponse(_stream_json_array(albums), media_type="application/json")
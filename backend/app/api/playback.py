@@ -3,6 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
+from cachetools import TTLCache
+import threading
+import os
 
 from app.database import get_db
 from app.services.playback_service import PlaybackService
@@ -36,13 +39,74 @@ class SetVolumeRequest(BaseModel):
     volume: int
 
 
+# (collection_id, track_id) -> current_track dict; the state endpoint is polled every second
+# but the display info only changes when the track or the collection layout changes
+_current_track_info_cache = TTLCache(maxsize=256, ttl=5)
+_current_track_info_lock = threading.Lock()
+
+
+def _get_current_track_info(db: Session, collection_id: str, track_id: str) -> dict | None:
+    """Display info for the current track, cached in-process for a few seconds."""
+    key = (collection_id, track_id)
+    with _current_track_info_lock:
+        if key in _current_track_info_cache:
+            return _current_track_info_cache[key]
+    
+    collection_service = CollectionService(db)
+    track_service = TrackService(db)
+    album_service = AlbumService(db)
+    current_track_info = None
+    track = track_service.get_track_by_id(track_id)
+    if track and track.album:
+        album = track.album
+        cover = album.custom_cover_art_path or album.cover_art_path
+        selection_display = None
+        track_number_1based = None
+        if collection_id == '00000000-0000-0000-0000-000000000000':
+            all_albums = album_service.get_all_albums(limit=10000)
+            for idx, a in enumerate(all_albums):
+                if a.id == album.id:
+                    track_ids = track_service.get_track_ids_by_album(album.id)
+                    if track.id in track_ids:
+                        ti = track_ids.index(track.id)
+                        track_number_1based = ti + 1
+                        selection_display = f"{(idx + 1):03d}-{(ti + 1):02d}"
+                    break
+        else:
+            sel = collection_service.get_selection_for_track(collection_id, track.id)
+            if sel:
+                track_number_1based = sel[1]
+                selection_display = f"{sel[0]:03d}-{sel[1]:02d}"
+        # ReplayGain: normalize loudness; prefer track gain, fallback to album gain
+        replaygain_db = track.replaygain_track_db
+        if replaygain_db is None:
+            replaygain_db = track.replaygain_album_db
+
+        current_track_info = {
+            "id": track.id,
+            "title": track.title,
+            "artist": track.artist,
+            "duration_ms": track.duration_ms,
+            "album_title": album.title,
+            "album_artist": album.artist,
+            "album_year": album.year,
+            "cover_art_path": cover,
+            "selection_display": selection_display,
+            "album_id": str(album.id),
+            "track_number": track_number_1based,
+            "replaygain_track_gain": replaygain_db,
+        }
+    
+    with _current_track_info_lock:
+        _current_track_info_cache[key] = current_track_info
+    return current_track_info
+
+
 @router.get("/state", response_model=PlaybackStateResponse)
-def get_playback_state(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db)):
+def get_playback_state(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db, scope="function")):
     """Get current playback state for a collection"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
-    track_service = TrackService(db)
-    album_service = AlbumService(db)
     
     # Handle "all" collection
     if collection == 'all':
@@ -58,52 +122,7 @@ def get_playback_state(collection: str = Query(..., description="Collection slug
     # Current track display: use only database-saved values (track/album rows), not file metadata
     current_track_info = None
     if state.current_track_id:
-        track = track_service.get_track_by_id(state.current_track_id)
-        if track and track.album:
-            album = track.album
-            cover = album.custom_cover_art_path or album.cover_art_path
-            selection_display = None
-            track_number_1based = None
-            if state.collection_id == '00000000-0000-0000-0000-000000000000':
-                all_albums = album_service.get_all_albums(limit=10000)
-                for idx, a in enumerate(all_albums):
-                    if a.id == album.id:
-                        tracks = track_service.get_tracks_by_album(album.id)
-                        for ti, t in enumerate(tracks):
-                            if t.id == track.id:
-                                track_number_1based = ti + 1
-                                selection_display = f"{(idx + 1):03d}-{(ti + 1):02d}"
-                                break
-                        break
-            else:
-                sel = collection_service.get_selection_for_track(state.collection_id, track.id)
-                if sel:
-                    track_number_1based = sel[1]
-                    selection_display = f"{sel[0]:03d}-{sel[1]:02d}"
-            # ReplayGain: normalize loudness; prefer track gain, fallback to album gain
-            extra = track.extra_metadata or {}
-            replaygain_track_gain = extra.get("replaygain_track_gain")
-            replaygain_album_gain = extra.get("replaygain_album_gain")
-            replaygain_db = None
-            if replaygain_track_gain is not None:
-                replaygain_db = float(replaygain_track_gain)
-            elif replaygain_album_gain is not None:
-                replaygain_db = float(replaygain_album_gain)
-
-            current_track_info = {
-                "id": track.id,
-                "title": track.title,
-                "artist": track.artist,
-                "duration_ms": track.duration_ms,
-                "album_title": album.title,
-                "album_artist": album.artist,
-                "album_year": album.year,
-                "cover_art_path": cover,
-                "selection_display": selection_display,
-                "album_id": str(album.id),
-                "track_number": track_number_1based,
-                "replaygain_track_gain": replaygain_db,
-            }
+        current_track_info = _get_current_track_info(db, state.collection_id, state.current_track_id)
     
     return {
         "collection_id": state.collection_id,
@@ -116,7 +135,7 @@ def get_playback_state(collection: str = Query(..., description="Collection slug
 
 
 @router.post("/play")
-def play(request: PlaybackControlRequest, db: Session = Depends(get_db)):
+def play(request: PlaybackControlRequest, db: Session = Depends(get_db, scope="function")):
     """Start or resume playback"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -136,7 +155,7 @@ def play(request: PlaybackControlRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/pause")
-def pause(request: PlaybackControlRequest, db: Session = Depends(get_db)):
+def pause(request: PlaybackControlRequest, db: Session = Depends(get_db, scope="function")):
     """Pause playback"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -156,7 +175,7 @@ def pause(request: PlaybackControlRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/stop")
-def stop(request: PlaybackControlRequest, db: Session = Depends(get_db)):
+def stop(request: PlaybackControlRequest, db: Session = Depends(get_db, scope="function")):
     """Stop playback"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -170,7 +189,7 @@ def stop(request: PlaybackControlRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/skip")
-def skip(request: PlaybackControlRequest, db: Session = Depends(get_db)):
+def skip(request: PlaybackControlRequest, db: Session = Depends(get_db, scope="function")):
     """Skip to next track"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -190,7 +209,7 @@ def skip(request: PlaybackControlRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/position")
-def update_position(request: UpdatePositionRequest, db: Session = Depends(get_db)):
+def update_position(request: UpdatePositionRequest, db: Session = Depends(get_db, scope="function")):
     """Update current playback position"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -198,19 +217,19 @@ def update_position(request: UpdatePositionRequest, db: Session = Depends(get_db
     # Handle "all" collection
     if request.collection == 'all':
         all_collection_id = '00000000-0000-0000-0000-000000000000'
-        state = playback_service.update_position(all_collection_id, request.position_ms)
+        position_ms = playback_service.update_position(all_collection_id, request.position_ms)
     else:
         collection_obj = collection_service.get_collection_by_slug(request.collection)
         if not collection_obj:
             raise HTTPException(status_code=404, detail=f"Collection '{request.collection}' not found")
         
-        state = playback_service.update_position(collection_obj.id, request.position_ms)
+        position_ms = playback_service.update_position(collection_obj.id, request.position_ms)
     
-    return {"message": "Position updated", "position_ms": state.current_position_ms if state else 0}
+    return {"message": "Position updated", "position_ms": position_ms}
 
 
 @router.post("/volume")
-def set_volume(request: SetVolumeRequest, db: Session = Depends(get_db)):
+def set_volume(request: SetVolumeRequest, db: Session = Depends(get_db, scope="function")):
     """Set playback volume"""
     collection_service = CollectionService(db)
     playback_service = PlaybackService(db)
@@ -236,7 +255,7 @@ class NextTransitionResponse(BaseModel):
 
 
 @router.get("/next-transition", response_model=NextTransitionResponse)
-def get_next_transition(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db)):
+def get_next_transition(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db, scope="function")):
     """Get next track id, replaygain, and whether to apply crossfade (false when next is consecutive on same album)."""
     playback_service = PlaybackService(db)
     collection_service = CollectionService(db)
@@ -256,7 +275,7 @@ def get_next_transition(collection: str = Query(..., description="Collection slu
 
 
 @router.get("/stream/{track_id}")
-def stream_track(track_id: str, db: Session = Depends(get_db)):
+def stream_track(track_id: str, db: Session = Depends(get_db, scope="function")):
     """Stream a FLAC file"""
     track_service = TrackService(db)
     
@@ -265,7 +284,7 @@ def stream_track(track_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail=f"Track '{track_id}' not found or file does not exist")
     
     return FileResponse(
-        path=str(file_path),
+        path=file_path,
         media_type="audio/flac",
-        filename=file_path.name
+        filename=os.path.basename(file_path)
     )
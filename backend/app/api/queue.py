@@ -57,7 +57,7 @@ class AddFavoritesRandomRequest(BaseModel):
 
 
 @router.get("", response_model=List[QueueItemResponse])
-def get_queue(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db)):
+def get_queue(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db, scope="function")):
     """Get current queue for a collection"""
     collection_service = CollectionService(db)
     queue_service = QueueService(db)
@@ -67,13 +67,13 @@ def get_queue(collection: str = Query(..., description="Collection slug"), db: S
     # Handle "all" collection
     if collection == 'all':
         all_collection_id = '00000000-0000-0000-0000-000000000000'
-        queue_items = queue_service.get_queue(all_collection_id, include_played=False)
+        queue_items = queue_service.get_queue(all_collection_id, include_played=False, with_tracks=True)
     else:
         collection_obj = collection_service.get_collection_by_slug(collection)
         if not collection_obj:
             raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
         
-        queue_items = queue_service.get_queue(collection_obj.id, include_played=False)
+        queue_items = queue_service.get_queue(collection_obj.id, include_played=False, with_tracks=True)
     
     # Build response with track info: use only database-saved values (track/album rows), not file metadata
     collection_id = all_collection_id if collection == 'all' else collection_obj.id
@@ -88,12 +88,11 @@ def get_queue(collection: str = Query(..., description="Collection slug"), db: S
                 all_albums = album_service.get_all_albums(limit=10000)
                 for idx, a in enumerate(all_albums):
                     if a.id == album.id:
-                        tracks = track_service.get_tracks_by_album(album.id)
-                        for ti, t in enumerate(tracks):
-                            if t.id == item.track.id:
-                                track_number_1based = ti + 1
-                                selection_display = f"{(idx + 1):03d}-{(ti + 1):02d}"
-                                break
+                        track_ids = track_service.get_track_ids_by_album(album.id)
+                        if item.track.id in track_ids:
+                            ti = track_ids.index(item.track.id)
+                            track_number_1based = ti + 1
+                            selection_display = f"{(idx + 1):03d}-{(ti + 1):02d}"
                         break
             else:
                 sel = collection_service.get_selection_for_track(collection_id, item.track.id)
@@ -123,7 +122,7 @@ def get_queue(collection: str = Query(..., description="Collection slug"), db: S
 
 
 @router.post("")
-def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db)):
+def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db, scope="function")):
     """Add track(s) to queue by album and track number"""
     collection_service = CollectionService(db)
     queue_service = QueueService(db)
@@ -153,15 +152,14 @@ def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db)):
             return {"message": f"Added {count} tracks to queue", "count": count}
         
         # Otherwise, add specific track by display position (1-indexed)
-        tracks = track_service.get_tracks_by_album(album.id)
-        if request.track_number < 1 or request.track_number > len(tracks):
+        track_ids = track_service.get_track_ids_by_album(album.id)
+        if request.track_number < 1 or request.track_number > len(track_ids):
             raise HTTPException(
                 status_code=404,
-                detail=f"Track {request.track_number} not found in album {request.album_number} (album has {len(tracks)} visible tracks)"
+                detail=f"Track {request.track_number} not found in album {request.album_number} (album has {len(track_ids)} visible tracks)"
             )
         
-        track = tracks[request.track_number - 1]
-        queue_item = queue_service.add_to_queue(all_collection_id, track.id)
+        queue_item = queue_service.add_to_queue(all_collection_id, track_ids[request.track_number - 1])
         if not queue_item:
             return {"message": "Already in queue", "already_queued": True}
         return {"message": "Track added to queue", "queue_id": queue_item.id}
@@ -175,7 +173,7 @@ def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db)):
     albums = collection_service.get_collection_albums(collection_obj.id, include_tracks=True)
     
     # Find album by display number
-    album = next((a for a in albums if a['display_number'] == request.album_number), None)
+    album = next((a for a in albums if a.display_number == request.album_number), None)
     if not album:
         raise HTTPException(
             status_code=404,
@@ -184,13 +182,13 @@ def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db)):
     
     # If track_number is 0, add all tracks from album (including hidden, excluding archived)
     if request.track_number == 0:
-        tracks_all = track_service.get_tracks_by_album(album['id'], enabled_only=False)
+        tracks_all = track_service.get_tracks_by_album(album.id, enabled_only=False)
         track_ids = [t.id for t in tracks_all if not getattr(t, 'archived', False)]
         count = queue_service.add_album_to_queue(collection_obj.id, track_ids)
         return {"message": f"Added {count} tracks to queue", "count": count}
     
     # Otherwise, add specific track by display position (1-indexed)
-    tracks = album.get('tracks', [])
+    tracks = album.tracks or []
     if request.track_number < 1 or request.track_number > len(tracks):
         raise HTTPException(
             status_code=404,
@@ -198,14 +196,14 @@ def add_to_queue(request: AddToQueueRequest, db: Session = Depends(get_db)):
         )
     
     track = tracks[request.track_number - 1]
-    queue_item = queue_service.add_to_queue(collection_obj.id, track['id'])
+    queue_item = queue_service.add_to_queue(collection_obj.id, track.id)
     if not queue_item:
         return {"message": "Already in queue", "already_queued": True}
     return {"message": "Track added to queue", "queue_id": queue_item.id}
 
 
 @router.post("/add-favorites-random")
-def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depends(get_db)):
+def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depends(get_db, scope="function")):
     """Add up to count random tracks from the collection to the queue based on mode.
 
     Modes:
@@ -230,14 +228,7 @@ def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depen
 
     # ── helpers ────────────────────────────────────────────────────────────────
 
-    def track_matches_dict(t: dict) -> bool:
-        if mode == 'any':
-            return True
-        if mode == 'favorites-and-recommended':
-            return bool(t.get('is_favorite')) or bool(t.get('is_recommended'))
-        return bool(t.get('is_favorite'))
-
-    def track_matches_obj(t) -> bool:
+    def track_matches(t) -> bool:
         if mode == 'any':
             return True
         if mode == 'favorites-and-recommended':
@@ -255,7 +246,7 @@ def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depen
         for album in all_albums:
             tracks = track_service.get_tracks_by_album(album.id)
             for t in tracks:
-                if track_matches_obj(t):
+                if track_matches(t):
                     other_track_ids.append(t.id)
         collection_id_for_queue = all_collection_id
     else:
@@ -269,22 +260,22 @@ def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depen
         end_slot = request.section_end_slot  # None → to end of collection
 
         for album in albums:
-            for t in album.get("tracks", []):
-                if not track_matches_dict(t):
+            for t in album.tracks or []:
+                if not track_matches(t):
                     continue
                 if use_section:
-                    slot = album.get("display_number")
+                    slot = album.display_number
                     in_section = (
                         slot is not None
                         and slot >= request.section_start_slot
                         and (end_slot is None or slot <= end_slot)
                     )
                     if in_section:
-                        section_track_ids.append(t["id"])
+                        section_track_ids.append(t.id)
                     else:
-                        other_track_ids.append(t["id"])
+                        other_track_ids.append(t.id)
                 else:
-                    other_track_ids.append(t["id"])
+                    other_track_ids.append(t.id)
 
     # ── remove already-queued tracks ──────────────────────────────────────────
 
@@ -362,7 +353,7 @@ def add_favorites_random(request: AddFavoritesRandomRequest, db: Session = Depen
 def reorder_queue(
     collection: str = Query(..., description="Collection slug"),
     body: ReorderQueueRequest = ...,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
 ):
     """Reorder queue by providing queue item IDs in the desired order (including currently playing)."""
     collection_service = CollectionService(db)
@@ -385,7 +376,7 @@ def reorder_queue(
 
 
 @router.delete("/{queue_id}")
-def remove_from_queue(queue_id: str, db: Session = Depends(get_db)):
+def remove_from_queue(queue_id: str, db: Session = Depends(get_db, scope="function")):
     """Remove a track from the queue"""
     queue_service = QueueService(db)
     
@@ -396,7 +387,7 @@ def remove_from_queue(queue_id: str, db: Session = Depends(get_db)):
 
 
 @router.delete("")
-def clear_queue(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db)):
+def clear_queue(collection: str = Query(..., description="Collection slug"), db: Session = Depends(get_db, scope="function")):
     """Clear the queue for a collection"""
     collection_service = CollectionService(db)
     queue_service = QueueService(db)
@@ -30,18 +30,18 @@ def _set_setting(db: Session, key: str, value: str) -> None:
         row.value = value
     else:
         db.add(Setting(key=key, value=value))
-    db.commit()
+    db.flush()
 
 
 @router.get("", response_model=SettingsResponse)
-def get_settings(db: Session = Depends(get_db)):
+def get_settings(db: Session = Depends(get_db, scope="function")):
     """Get jukebox settings (e.g. default collection)."""
     slug = _get_setting(db, DEFAULT_COLLECTION_KEY)
     return SettingsResponse(default_collection_slug=slug or "all")
 
 
 @router.patch("", response_model=SettingsResponse)
-def update_settings(body: SettingsUpdate, db: Session = Depends(get_db)):
+def update_settings(body: SettingsUpdate, db: Session = Depends(get_db, scope="function")):
     """Update settings (e.g. set default collection)."""
     if not body.default_collection_slug or not body.default_collection_slug.strip():
         raise HTTPException(status_code=400, detail="default_collection_slug is required")
@@ -29,6 +29,12 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     
+    # Playback: how often buffered position heartbeats are written to the database
+    position_flush_interval_seconds: int = 10
+    
+    # Development: make unplanned lazy loads raise instead of silently issuing queries
+    debug_raiseload: bool = False
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins string into list"""
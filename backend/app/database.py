@@ -1,5 +1,5 @@
 """Database configuration and session management"""
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from typing import Generator
@@ -13,9 +13,22 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-    echo=False
+    echo=False,
+    future=True
 )
 
+if settings.database_url.startswith("sqlite"):
+    # pysqlite only emits BEGIN before DML, so a SAVEPOINT (Session.begin_nested) issued
+    # first would open, and on RELEASE commit, the outer transaction. Let SQLAlchemy
+    # control transactions instead (the recipe from the SQLAlchemy SQLite dialect docs).
+    @event.listens_for(engine, "connect")
+    def _sqlite_disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _sqlite_emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -23,16 +36,34 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Deletes duplicate pending/playing queue entries for the same track, keeping the earliest
+QUEUE_ACTIVE_DEDUPE_SQL = (
+    "DELETE FROM queue WHERE status IN ('PENDING', 'PLAYING') AND EXISTS ("
+    "SELECT 1 FROM queue q2 WHERE q2.collection_id = queue.collection_id "
+    "AND q2.track_id = queue.track_id AND q2.status IN ('PENDING', 'PLAYING') "
+    "AND (q2.position < queue.position OR (q2.position = queue.position AND q2.id < queue.id)))"
+)
+
+
 def get_db() -> Generator:
     """
     Dependency function to get database session.
     
+    The session is one transaction per request: services only flush, and the
+    transaction is committed here once the handler returns (rolled back if it
+    raises). Declare it with Depends(get_db, scope="function") so the commit
+    happens before the response is sent.
+    
     Yields:
         Database session
     """
     db = SessionLocal()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
@@ -69,8 +100,85 @@ def _migrate_collections_sections_sqlite():
                 logger.info(f"Added collections.{col} column")
 
 
+def _migrate_collection_album_tracks_sqlite():
+    """Backfill collection_album_tracks from the legacy collection_albums.enabled_track_ids JSON column (SQLite)."""
+    with engine.connect() as conn:
+        r = conn.execute(text("PRAGMA table_info(collection_albums)"))
+        names = [row[1] for row in r.fetchall()]
+        if "enabled_track_ids" not in names:
+            return
+        if conn.execute(text("SELECT 1 FROM collection_album_tracks LIMIT 1")).first():
+            return
+        conn.execute(text(
+            "INSERT OR IGNORE INTO collection_album_tracks (collection_album_id, track_id) "
+            "SELECT ca.id, je.value FROM collection_albums ca, json_each(ca.enabled_track_ids) je "
+            "WHERE ca.enabled_track_ids IS NOT NULL"
+        ))
+        conn.commit()
+        logger.info("Backfilled collection_album_tracks from collection_albums.enabled_track_ids")
+
+
+def _migrate_queue_indexes_sqlite():
+    """Create the composite and active-track unique queue indexes on existing databases (SQLite)."""
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_queue_cid_status_pos ON queue (collection_id, status, position)"
+        ))
+        # ix_queue_active is a PostgreSQL partial index; earlier create_all/Alembic runs
+        # built it on SQLite as a plain index duplicating ix_queue_cid_status_pos
+        conn.execute(text("DROP INDEX IF EXISTS ix_queue_active"))
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_queue_active_track'"
+        )).first()
+        if not exists:
+            # Keep only the earliest pending/playing entry per track before enforcing uniqueness
+            conn.execute(text(QUEUE_ACTIVE_DEDUPE_SQL))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX ux_queue_active_track ON queue (collection_id, track_id) "
+                "WHERE status IN ('PENDING', 'PLAYING')"
+            ))
+            logger.info("Created queue.ux_queue_active_track index")
+        conn.commit()
+
+
+def _migrate_track_replaygain_sqlite():
+    """Add numeric replaygain columns to tracks and backfill them from extra_metadata (SQLite)."""
+    with engine.connect() as conn:
+        r = conn.execute(text("PRAGMA table_info(tracks)"))
+        names = [row[1] for row in r.fetchall()]
+        if "replaygain_track_db" in names and "replaygain_album_db" in names:
+            return
+        for col in ("replaygain_track_db", "replaygain_album_db"):
+            if col not in names:
+                conn.execute(text(f"ALTER TABLE tracks ADD COLUMN {col} FLOAT"))
+        conn.execute(text(
+            "UPDATE tracks SET "
+            "replaygain_track_db = CAST(json_extract(extra_metadata, '$.replaygain_track_gain') AS REAL), "
+            "replaygain_album_db = CAST(json_extract(extra_metadata, '$.replaygain_album_gain') AS REAL) "
+            "WHERE extra_metadata IS NOT NULL"
+        ))
+        conn.commit()
+        logger.info("Added tracks.replaygain_track_db/replaygain_album_db columns")
+
+
+def _migrate_playback_position_epoch_sqlite():
+    """Add playback_state.position_epoch if missing (SQLite)."""
+    with engine.connect() as conn:
+        r = conn.execute(text("PRAGMA table_info(playback_state)"))
+        names = [row[1] for row in r.fetchall()]
+        if "position_epoch" in names:
+            return
+        conn.execute(text("ALTER TABLE playback_state ADD COLUMN position_epoch INTEGER DEFAULT 0 NOT NULL"))
+        conn.commit()
+        logger.info("Added playback_state.position_epoch column")
+
+
 def init_db():
     """Initialize database tables and run migrations."""
     Base.metadata.create_all(bind=engine)
     if settings.database_url.startswith("sqlite"):
         _migrate_collections_sections_sqlite()
+        _migrate_collection_album_tracks_sqlite()
+        _migrate_queue_indexes_sqlite()
+        _migrate_track_replaygain_sqlite()
+        _migrate_playback_position_epoch_sqlite()
@@ -2,12 +2,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from app.config import settings
 from app.database import init_db
 from app.api import collections, albums, queue, playback, admin, media, settings as settings_api
 from app.services.collection_service import CollectionService
+from app.services.playback_service import flush_positions
 from app.database import SessionLocal
 
 # Configure logging
@@ -54,12 +56,27 @@ async def lifespan(app: FastAPI):
     
     logger.info("Collections ready (managed in database)")
     
+    # Periodically persist buffered playback positions
+    position_flusher = asyncio.create_task(_flush_positions_periodically())
+    
     logger.info("Application startup complete")
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    position_flusher.cancel()
+    flush_positions()
+
+
+async def _flush_positions_periodically():
+    """Write buffered playback positions every position_flush_interval_seconds."""
+    while True:
+        await asyncio.sleep(settings.position_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(flush_positions)
+        except Exception as e:
+            logger.error(f"Failed to flush playback positions: {e}")
 
 
 # Create FastAPI app
@@ -3,6 +3,7 @@ from app.models.album import Album
 from app.models.track import Track
 from app.models.collection import Collection
 from app.models.collection_album import CollectionAlbum
+from app.models.collection_album_track import CollectionAlbumTrack
 from app.models.queue import Queue
 from app.models.playback_state import PlaybackState
 from app.models.setting import Setting
@@ -12,6 +13,7 @@ __all__ = [
     "Track",
     "Collection",
     "CollectionAlbum",
+    "CollectionAlbumTrack",
     "Queue",
     "PlaybackState",
     "Setting",
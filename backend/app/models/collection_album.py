@@ -1,5 +1,5 @@
 """Collection Album model (many-to-many relationship)"""
-from sqlalchemy import Column, String, Integer, JSON, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -18,13 +18,13 @@ class CollectionAlbum(Base):
     album_id = Column(String, ForeignKey("albums.id", ondelete="CASCADE"), nullable=False, index=True)
     display_number = Column(Integer, nullable=False)  # 1-999, dynamically assigned based on sort_order
     sort_order = Column(Integer, nullable=False)  # Actual sort position, can be changed
-    enabled_track_ids = Column(JSON, default=list)  # Array of track UUIDs enabled for this collection
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
     
     # Relationships
     collection = relationship("Collection", back_populates="collection_albums")
     album = relationship("Album", back_populates="collection_albums")
+    enabled_tracks = relationship("CollectionAlbumTrack", back_populates="collection_album", cascade="all, delete-orphan")  # Tracks enabled for this collection
     
     # Ensure unique album per collection
     __table_args__ = (
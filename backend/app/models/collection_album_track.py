@@ -0,0 +1,21 @@
+"""Collection Album Track model (enabled tracks per collection album)"""
+from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class CollectionAlbumTrack(Base):
+    """CollectionAlbumTrack model representing a track enabled for an album within a collection"""
+    
+    __tablename__ = "collection_album_tracks"
+    
+    collection_album_id = Column(String, ForeignKey("collection_albums.id", ondelete="CASCADE"), primary_key=True)
+    track_id = Column(String, ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True, index=True)
+    
+    # Relationships
+    collection_album = relationship("CollectionAlbum", back_populates="enabled_tracks")
+    track = relationship("Track", back_populates="collection_album_tracks")
+    
+    def __repr__(self):
+        return f"<CollectionAlbumTrack(collection_album_id={self.collection_album_id}, track_id={self.track_id})>"
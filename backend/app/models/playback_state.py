@@ -19,6 +19,9 @@ class PlaybackState(Base):
     is_playing = Column(Boolean, default=False)
     current_position_ms = Column(Integer, default=0)  # Current position in milliseconds
     volume = Column(Integer, default=70)  # Volume 0-100
+    # Bumped whenever play/pause/skip/stop set the position, so a buffered heartbeat
+    # flush that started earlier cannot write a stale position over theirs
+    position_epoch = Column(Integer, default=0, nullable=False, server_default="0")
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
     
     # Relationships
@@ -1,5 +1,5 @@
 """Queue model"""
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -16,6 +16,10 @@ class QueueStatus(str, enum.Enum):
     PLAYED = "played"
 
 
+# Matches the stored enum names; used as the predicate of the partial unique index
+ACTIVE_STATUS_SQL = text("status IN ('PENDING', 'PLAYING')")
+
+
 class Queue(Base):
     """Queue model representing tracks in the playback queue"""
     
@@ -33,5 +37,20 @@ class Queue(Base):
     collection = relationship("Collection", back_populates="queue_items")
     track = relationship("Track", back_populates="queue_items")
     
+    # Hot queue lookups filter on (collection_id, status) and order by position
+    __table_args__ = (
+        Index('ix_queue_cid_status_pos', 'collection_id', 'status', 'position'),
+        # Partial index for PostgreSQL only; on SQLite it would be a plain, redundant index
+        Index(
+            'ix_queue_active', 'collection_id', 'position',
+            postgresql_where=ACTIVE_STATUS_SQL
+        ).ddl_if(dialect='postgresql'),
+        # A track can be pending/playing at most once per collection (add_to_queue relies on this)
+        Index(
+            'ux_queue_active_track', 'collection_id', 'track_id', unique=True,
+            postgresql_where=ACTIVE_STATUS_SQL, sqlite_where=ACTIVE_STATUS_SQL
+        ),
+    )
+    
     def __repr__(self):
         return f"<Queue(id={self.id}, track_id={self.track_id}, position={self.position}, status={self.status})>"
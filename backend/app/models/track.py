@@ -1,5 +1,5 @@
 """Track model"""
-from sqlalchemy import Column, String, Integer, Boolean, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, Boolean, JSON, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -26,12 +26,15 @@ class Track(Base):
     is_favorite = Column(Boolean, default=False)  # User-marked favorite
     is_recommended = Column(Boolean, default=False)  # User-marked recommended
     extra_metadata = Column(JSON, default=dict)  # Additional metadata
+    replaygain_track_db = Column(Float, nullable=True)  # Copy of extra_metadata replaygain_track_gain
+    replaygain_album_db = Column(Float, nullable=True)  # Copy of extra_metadata replaygain_album_gain
     created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, server_default=func.now())
     
     # Relationships
     album = relationship("Album", back_populates="tracks")
     queue_items = relationship("Queue", back_populates="track", cascade="all, delete-orphan")
+    collection_album_tracks = relationship("CollectionAlbumTrack", back_populates="track", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Track(id={self.id}, artist='{self.artist}', title='{self.title}', track_number={self.track_number})>"
@@ -6,12 +6,29 @@ import logging
 from app.models.album import Album
 from app.models.track import Track
 from app.utils.metadata_extractor import MetadataExtractor
+from app.services.track_service import invalidate_album_tracks
 
 logger = logging.getLogger(__name__)
 
 
+def _replaygain_columns(extra: Optional[dict]) -> dict:
+    """Numeric ReplayGain column values for a track from its extra_metadata."""
+    extra = extra or {}
+    track_gain = extra.get('replaygain_track_gain')
+    album_gain = extra.get('replaygain_album_gain')
+    return {
+        'replaygain_track_db': float(track_gain) if track_gain is not None else None,
+        'replaygain_album_db': float(album_gain) if album_gain is not None else None,
+    }
+
+
 class AlbumService:
-    """Service for album-related operations"""
+    """
+    Service for album-related operations
+    
+    Methods flush but never commit; the caller controls the transaction scope
+    (get_db commits once per request).
+    """
     
     def __init__(self, db: Session):
         """
@@ -71,7 +88,7 @@ class AlbumService:
                     results['errors'].append(error_msg)
                     results['albums_skipped'] += 1
             
-            self.db.commit()
+            self.db.flush()
             logger.info(f"Library scan complete: {results}")
             
         except Exception as e:
@@ -117,7 +134,8 @@ class AlbumService:
                 title=track_data['title'],
                 artist=track_data['artist'],
                 duration_ms=track_data['duration_ms'],
-                extra_metadata=track_data.get('extra_metadata', {})
+                extra_metadata=track_data.get('extra_metadata', {}),
+                **_replaygain_columns(track_data.get('extra_metadata'))
             )
             self.db.add(track)
         
@@ -158,6 +176,8 @@ class AlbumService:
                 if key in extra:
                     existing[key] = extra[key]
             track.extra_metadata = existing
+            for column, value in _replaygain_columns(existing).items():
+                setattr(track, column, value)
     
     def _update_album_from_data(self, album: Album, album_data: dict) -> Album:
         """
@@ -181,6 +201,7 @@ class AlbumService:
         
         # Delete existing tracks
         self.db.query(Track).filter(Track.album_id == album.id).delete()
+        invalidate_album_tracks(self.db, album.id)
         
         # Create new tracks
         for track_data in album_data.get('tracks', []):
@@ -192,7 +213,8 @@ class AlbumService:
                 title=track_data['title'],
                 artist=track_data['artist'],
                 duration_ms=track_data['duration_ms'],
-                extra_metadata=track_data.get('extra_metadata', {})
+                extra_metadata=track_data.get('extra_metadata', {}),
+                **_replaygain_columns(track_data.get('extra_metadata'))
             )
             self.db.add(track)
         
@@ -248,6 +270,7 @@ class AlbumService:
         album = self.get_album_by_id(album_id)
         if album:
             self.db.delete(album)
-            self.db.commit()
+            self.db.flush()
+            invalidate_album_tracks(self.db, album_id)
             return True
         return False
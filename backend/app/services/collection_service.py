@@ -1,13 +1,16 @@
 """Collection service for managing collections and their albums"""
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, select, lambda_stmt
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Iterator
 import json
 import logging
+import msgspec
 from pathlib import Path
 
 from app.models.collection import Collection
 from app.models.collection_album import CollectionAlbum
+from app.models.collection_album_track import CollectionAlbumTrack
 from app.models.album import Album
 from app.models.track import Track
 from app.config import settings
@@ -15,8 +18,38 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+class TrackOut(msgspec.Struct):
+    """Track enabled for an album in a collection"""
+    id: str
+    disc_number: Optional[int]
+    track_number: int
+    title: str
+    artist: str
+    duration_ms: Optional[int]
+    is_favorite: Optional[bool]
+    is_recommended: Optional[bool]
+
+
+class AlbumOut(msgspec.Struct, omit_defaults=True):
+    """Album in a collection with its display number (tracks only when requested)"""
+    id: str
+    display_number: int
+    title: str
+    artist: str
+    cover_art_path: Optional[str]
+    year: Optional[int]
+    total_tracks: Optional[int]
+    has_multi_disc: Optional[bool]
+    tracks: Optional[List[TrackOut]] = None
+
+
 class CollectionService:
-    """Service for collection-related operations"""
+    """
+    Service for collection-related operations
+    
+    Methods flush but never commit; the caller controls the transaction scope
+    (get_db commits once per request).
+    """
     
     def __init__(self, db: Session):
         """
@@ -53,7 +86,7 @@ class CollectionService:
         )
         
         self.db.add(collection)
-        self.db.commit()
+        self.db.flush()
         
         logger.info(f"Created collection: {name} ({slug})")
         return collection
@@ -76,20 +109,26 @@ class CollectionService:
         if not collection:
             return None
 
-        if name is not None:
-            collection.name = name
-        if slug is not None:
-            if slug != collection.slug:
-                existing = self.db.query(Collection).filter(Collection.slug == slug).first()
-                if existing:
-                    raise ValueError(f"Collection with slug '{slug}' already exists")
-            collection.slug = slug
-        if description is not None:
-            collection.description = description
-        if is_active is not None:
-            collection.is_active = is_active
-
-        self.db.commit()
+        # Rely on the unique indexes instead of checking for duplicates up front. The
+        # changes are made inside a savepoint, so a conflict undoes only them and the
+        # request transaction stays with get_db.
+        try:
+            with self.db.begin_nested():
+                if name is not None:
+                    collection.name = name
+                if slug is not None:
+                    collection.slug = slug
+                if description is not None:
+                    collection.description = description
+                if is_active is not None:
+                    collection.is_active = is_active
+                self.db.flush()
+        except IntegrityError:
+            if slug is not None and self.db.query(Collection.id).filter(
+                Collection.slug == slug, Collection.id != collection_id
+            ).first():
+                raise ValueError(f"Collection with slug '{slug}' already exists")
+            raise ValueError(f"Collection with name '{name}' already exists")
         logger.info(f"Updated collection: {collection.name}")
         return collection
 
@@ -123,25 +162,20 @@ class CollectionService:
                     raise ValueError("Section order must be unique")
                 seen_orders.add(order)
             # Validate ranges if present: contiguous 1-based; last section may have end_slot omitted ("to end")
-            def has_ranges(sections_list):
-                if not sections_list:
-                    return False
-                sorted_sec = sorted(sections_list, key=lambda s: s.get("order", 0))
-                for i, s in enumerate(sorted_sec):
-                    if not isinstance(s, dict) or s.get("start_slot") is None:
-                        return False
-                    if i < len(sorted_sec) - 1 and s.get("end_slot") is None:
-                        return False  # non-last section must have end_slot
-                return True
+            sorted_by_order = sorted(sections, key=lambda s: s.get("order", 0))
+            last_index = len(sorted_by_order) - 1
+            has_ranges = all(
+                s.get("start_slot") is not None and (i == last_index or s.get("end_slot") is not None)
+                for i, s in enumerate(sorted_by_order)
+            )
 
-            if has_ranges(sections):
-                sorted_by_order = sorted(sections, key=lambda s: s.get("order", 0))
+            if has_ranges:
                 for i, sec in enumerate(sorted_by_order):
                     start_slot = sec.get("start_slot")
                     end_slot = sec.get("end_slot")
                     if start_slot is None or start_slot < 1:
                         raise ValueError("Section start_slot must be >= 1")
-                    is_last = i == len(sorted_by_order) - 1
+                    is_last = i == last_index
                     if is_last:
                         # Last section: end_slot may be None (open-ended so new albums are included)
                         if end_slot is not None and end_slot < 1:
@@ -157,7 +191,6 @@ class CollectionService:
                         raise ValueError("First section must start at slot 1")
                     if i > 0:
                         prev_end = sorted_by_order[i - 1].get("end_slot")
-                        prev_start = sorted_by_order[i - 1].get("start_slot")
                         if prev_end is None:
                             raise ValueError("Only the last section may have end_slot omitted")
                         if start_slot != prev_end + 1:
@@ -166,7 +199,7 @@ class CollectionService:
         else:
             collection.sections = None
         collection.sections_enabled = sections_enabled
-        self.db.commit()
+        self.db.flush()
         logger.info(f"Updated sections for collection: {collection.name}")
         return collection
 
@@ -208,7 +241,7 @@ class CollectionService:
             if default_hit_button_mode not in valid_modes:
                 raise ValueError(f"default_hit_button_mode must be one of {valid_modes}")
             collection.default_hit_button_mode = default_hit_button_mode
-        self.db.commit()
+        self.db.flush()
         logger.info(f"Updated settings for collection: {collection.name}")
         return collection
 
@@ -225,7 +258,7 @@ class CollectionService:
         collection = self.db.query(Collection).filter(Collection.id == collection_id).first()
         if collection:
             self.db.delete(collection)
-            self.db.commit()
+            self.db.flush()
             logger.info(f"Deleted collection: {collection.name}")
             return True
         return False
@@ -286,7 +319,8 @@ class CollectionService:
         Returns:
             Collection instance or None
         """
-        return self.db.query(Collection).filter(Collection.slug == slug).first()
+        stmt = lambda_stmt(lambda: select(Collection).where(Collection.slug == slug))
+        return self.db.execute(stmt).scalar_one_or_none()
     
     def get_all_collections(self) -> List[Collection]:
         """
@@ -297,7 +331,21 @@ class CollectionService:
         """
         return self.db.query(Collection).filter(Collection.is_active == True).all()
     
-    def get_collection_albums(self, collection_id: str, include_tracks: bool = False) -> List[dict]:
+    def list_collections_summary(self) -> List[Any]:
+        """
+        Get id, name, slug and is_active for all active collections
+        
+        Projects only those columns (no sections JSON, no ORM identities) for listings
+        that do not need the full Collection.
+        
+        Returns:
+            List of rows with id, name, slug, is_active attributes
+        """
+        return self.db.query(
+            Collection.id, Collection.name, Collection.slug, Collection.is_active
+        ).filter(Collection.is_active == True).all()
+    
+    def get_collection_albums(self, collection_id: str, include_tracks: bool = False) -> List[AlbumOut]:
         """
         Get all albums in a collection with display numbers
         
@@ -306,57 +354,72 @@ class CollectionService:
             include_tracks: Whether to include track information
             
         Returns:
-            List of album dictionaries with display numbers
+            List of AlbumOut structs with display numbers
+        """
+        return list(self.iter_collection_albums(collection_id, include_tracks=include_tracks))
+    
+    def iter_collection_albums(self, collection_id: str, include_tracks: bool = False) -> Iterator[AlbumOut]:
+        """
+        Iterate albums in a collection with display numbers, fetching rows in batches
+        
+        Args:
+            collection_id: Collection UUID
+            include_tracks: Whether to include track information
+            
+        Yields:
+            AlbumOut structs with display numbers, in display order
         """
         collection_albums = self.db.query(CollectionAlbum).filter(
             CollectionAlbum.collection_id == collection_id
-        ).order_by(CollectionAlbum.display_number).all()
+        ).order_by(CollectionAlbum.display_number).execution_options(stream_results=True).yield_per(200)
         
-        result = []
         for ca in collection_albums:
             if not ca.album or ca.album.archived:
                 continue
             
-            album_dict = {
-                'id': ca.album.id,
-                'display_number': ca.display_number,
-                'title': ca.album.title,
-                'artist': ca.album.artist,
-                'cover_art_path': ca.album.cover_art_path,
-                'year': ca.album.year,
-                'total_tracks': ca.album.total_tracks,
-                'has_multi_disc': ca.album.has_multi_disc,
-            }
+            album_out = AlbumOut(
+                id=ca.album.id,
+                display_number=ca.display_number,
+                title=ca.album.title,
+                artist=ca.album.artist,
+                cover_art_path=ca.album.cover_art_path,
+                year=ca.album.year,
+                total_tracks=ca.album.total_tracks,
+                has_multi_disc=ca.album.has_multi_disc,
+            )
             
             if include_tracks:
                 # Get enabled tracks for this collection (visible in UI; can be selected individually)
                 # Exclude archived so they never appear or get added when adding whole album
-                enabled_track_ids = set(ca.enabled_track_ids)
-                tracks = self.db.query(Track).filter(
+                tracks = self.db.query(Track).join(
+                    CollectionAlbumTrack,
+                    and_(
+                        CollectionAlbumTrack.collection_album_id == ca.id,
+                        CollectionAlbumTrack.track_id == Track.id
+                    )
+                ).filter(
                     and_(
                         Track.album_id == ca.album.id,
-                        Track.id.in_(enabled_track_ids),
                         Track.enabled == True,  # Respect global track enabled setting
                         Track.archived == False  # Archived tracks hidden and excluded from queue
                     )
                 ).order_by(Track.disc_number, Track.track_number).all()
                 
-                album_dict['tracks'] = [
-                    {
-                        'id': track.id,
-                        'disc_number': track.disc_number,
-                        'track_number': track.track_number,
-                        'title': track.title,
-                        'artist': track.artist,
-                        'duration_ms': track.duration_ms,
-                        'is_favorite': track.is_favorite,
-                    }
+                album_out.tracks = [
+                    TrackOut(
+                        id=track.id,
+                        disc_number=track.disc_number,
+                        track_number=track.track_number,
+                        title=track.title,
+                        artist=track.artist,
+                        duration_ms=track.duration_ms,
+                        is_favorite=track.is_favorite,
+                        is_recommended=track.is_recommended,
+                    )
                     for track in tracks
                 ]
             
-            result.append(album_dict)
-        
-        return result
+            yield album_out
 
     def get_selection_for_track(self, collection_id: str, track_id: str) -> Optional[tuple]:
         """
@@ -372,13 +435,15 @@ class CollectionService:
         ).first()
         if not ca or not ca.album or ca.album.archived:
             return None
-        enabled_ids = set(ca.enabled_track_ids or [])
-        if track_id not in enabled_ids:
-            return None
-        tracks = self.db.query(Track).filter(
+        tracks = self.db.query(Track).join(
+            CollectionAlbumTrack,
+            and_(
+                CollectionAlbumTrack.collection_album_id == ca.id,
+                CollectionAlbumTrack.track_id == Track.id
+            )
+        ).filter(
             and_(
                 Track.album_id == track.album_id,
-                Track.id.in_(enabled_ids),
                 Track.enabled == True,
             )
         ).order_by(Track.disc_number, Track.track_number).all()
@@ -387,6 +452,23 @@ class CollectionService:
                 return (ca.display_number, i + 1)
         return None
 
+    def _get_collection_album(self, collection_id: str, album_id: str) -> Optional[CollectionAlbum]:
+        """
+        Get the membership row for an album in a collection
+        
+        Args:
+            collection_id: Collection UUID
+            album_id: Album UUID
+            
+        Returns:
+            CollectionAlbum instance or None
+        """
+        stmt = lambda_stmt(lambda: select(CollectionAlbum).where(
+            CollectionAlbum.collection_id == collection_id,
+            CollectionAlbum.album_id == album_id
+        ))
+        return self.db.execute(stmt).scalar_one_or_none()
+    
     def add_album_to_collection(self, collection_id: str, album_id: str, sort_order: int = None) -> Optional[CollectionAlbum]:
         """
         Add an album to a collection
@@ -400,25 +482,23 @@ class CollectionService:
             CollectionAlbum instance or None on error
         """
         # Check if already exists
-        existing = self.db.query(CollectionAlbum).filter(
-            and_(
-                CollectionAlbum.collection_id == collection_id,
-                CollectionAlbum.album_id == album_id
-            )
-        ).first()
+        existing = self._get_collection_album(collection_id, album_id)
         
         if existing:
             logger.warning(f"Album {album_id} already in collection {collection_id}")
             return existing
         
-        # Get album to enable all tracks by default
-        album = self.db.query(Album).filter(Album.id == album_id).first()
-        if not album:
+        # Album must exist; all of its tracks are enabled by default
+        if not self.db.query(Album.id).filter(Album.id == album_id).first():
             logger.error(f"Album not found: {album_id}")
             return None
         
-        # Get all track IDs for this album
-        track_ids = [track.id for track in album.tracks]
+        # Get all track IDs for this album (id-only projection, no Track rows loaded)
+        track_ids = [
+            track_id for (track_id,) in self.db.query(Track.id).filter(
+                Track.album_id == album_id
+            ).order_by(Track.disc_number, Track.track_number).all()
+        ]
         
         # Determine sort order
         if sort_order is None:
@@ -432,16 +512,21 @@ class CollectionService:
             collection_id=collection_id,
             album_id=album_id,
             sort_order=sort_order,
-            display_number=0,  # Will be recalculated
-            enabled_track_ids=track_ids
+            display_number=0  # Will be recalculated
         )
         
         self.db.add(collection_album)
         self.db.flush()
         
+        # Enable all tracks for this collection
+        self.db.bulk_insert_mappings(CollectionAlbumTrack, [
+            {'collection_album_id': collection_album.id, 'track_id': track_id}
+            for track_id in track_ids
+        ])
+        
         # Recalculate display numbers
         self.recalculate_display_numbers(collection_id)
-        self.db.commit()
+        self.db.flush()
         
         return collection_album
     
@@ -456,17 +541,12 @@ class CollectionService:
         Returns:
             True if removed, False if not found
         """
-        collection_album = self.db.query(CollectionAlbum).filter(
-            and_(
-                CollectionAlbum.collection_id == collection_id,
-                CollectionAlbum.album_id == album_id
-            )
-        ).first()
+        collection_album = self._get_collection_album(collection_id, album_id)
         
         if collection_album:
             self.db.delete(collection_album)
             self.recalculate_display_numbers(collection_id)
-            self.db.commit()
+            self.db.flush()
             return True
         
         return False
@@ -483,17 +563,14 @@ class CollectionService:
         Returns:
             True if updated, False if not found
         """
-        collection_album = self.db.query(CollectionAlbum).filter(
-            and_(
-                CollectionAlbum.collection_id == collection_id,
-                CollectionAlbum.album_id == album_id
-            )
-        ).first()
+        collection_album = self._get_collection_album(collection_id, album_id)
         
         if collection_album:
+            if collection_album.sort_order == new_sort_order:
+                return True
             collection_album.sort_order = new_sort_order
             self.recalculate_display_numbers(collection_id)
-            self.db.commit()
+            self.db.flush()
             return True
         
         return False
@@ -506,13 +583,14 @@ class CollectionService:
         """
         if not album_ids:
             return True
-        collection_albums = {
-            ca.album_id: ca
-            for ca in self.db.query(CollectionAlbum).filter(
-                CollectionAlbum.collection_id == collection_id,
-                CollectionAlbum.album_id.in_(album_ids),
-            ).all()
-        }
+        current = self.db.query(CollectionAlbum).filter(
+            CollectionAlbum.collection_id == collection_id
+        ).order_by(CollectionAlbum.display_number).all()
+        if [ca.album_id for ca in current] == album_ids:
+            # Already in the requested order; nothing to update
+            return True
+        requested = set(album_ids)
+        collection_albums = {ca.album_id: ca for ca in current if ca.album_id in requested}
         if len(collection_albums) != len(album_ids):
             # Duplicate or unknown album_id in list
             return False
@@ -520,5 +598,5 @@ class CollectionService:
             collection_albums[album_id].sort_order = index
         self.db.flush()  # ensure sort_order is visible to the next query
         self.recalculate_display_numbers(collection_id)
-        self.db.commit()
+        self.db.flush()
         return True
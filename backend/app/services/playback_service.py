@@ -1,19 +1,101 @@
 """Playback service for managing playback state"""
-from sqlalchemy.orm import Session
-from typing import Optional, Tuple
+from sqlalchemy import Integer, bindparam, func, or_, select, update
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, Optional, Tuple
+from functools import cached_property
+import threading
 import logging
 
+from app.database import SessionLocal
 from app.models.playback_state import PlaybackState
 from app.models.queue import Queue, QueueStatus
-from app.models.track import Track
 from app.services.queue_service import QueueService
 from app.services.track_service import TrackService
 
 logger = logging.getLogger(__name__)
 
+_PLAYBACK_STATE_STMT = select(PlaybackState).where(PlaybackState.collection_id == bindparam('collection_id'))
+
+# collection_id -> (latest reported position, position_epoch it was reported in) not yet
+# written to playback_state. Position heartbeats land here; flush_positions writes them
+# in one batch, and only while the row's position_epoch still matches.
+_pending_positions: Dict[str, Tuple[int, Optional[int]]] = {}
+# collection_id -> position_epoch last read from or written to its playback_state row
+_position_epochs: Dict[str, int] = {}
+_pending_positions_lock = threading.Lock()
+
+
+def _take_pending_position(collection_id: str) -> Optional[int]:
+    """Remove and return the buffered position for a collection, if any."""
+    with _pending_positions_lock:
+        pending = _pending_positions.pop(collection_id, None)
+    return pending[0] if pending else None
+
+
+def _new_position_epoch(state: PlaybackState) -> None:
+    """
+    Drop the buffered position and move state to a new position epoch
+    
+    Called before play/skip/stop set the position themselves: a flush that
+    snapshotted an older heartbeat then matches no row instead of overwriting it.
+    """
+    epoch = (state.position_epoch or 0) + 1
+    state.position_epoch = epoch
+    with _pending_positions_lock:
+        _pending_positions.pop(state.collection_id, None)
+        _position_epochs[state.collection_id] = epoch
+
+
+def flush_positions() -> int:
+    """
+    Write buffered playback positions to the database in one executemany UPDATE
+    
+    Entries whose position_epoch no longer matches the row (play/skip/stop ran
+    since the heartbeat) are skipped. If the write fails the entries go back into
+    the buffer, unless a newer heartbeat has replaced them meanwhile.
+    
+    Returns:
+        Number of collections flushed
+    """
+    with _pending_positions_lock:
+        positions = dict(_pending_positions)
+        _pending_positions.clear()
+    if not positions:
+        return 0
+    
+    table = PlaybackState.__table__
+    epoch = bindparam('epoch', type_=Integer)
+    db = SessionLocal()
+    try:
+        db.execute(
+            table.update()
+            .where(
+                table.c.collection_id == bindparam('cid'),
+                or_(epoch.is_(None), table.c.position_epoch == epoch)
+            )
+            .values(current_position_ms=bindparam('pos')),
+            [{'cid': cid, 'pos': pos, 'epoch': epoch_} for cid, (pos, epoch_) in positions.items()]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _pending_positions_lock:
+            for cid, pending in positions.items():
+                _pending_positions.setdefault(cid, pending)
+        raise
+    finally:
+        db.close()
+    return len(positions)
+
 
 class PlaybackService:
-    """Service for playback state operations"""
+    """
+    Service for playback state operations
+    
+    Methods flush but never commit; the caller controls the transaction scope
+    (get_db commits once per request).
+    """
     
     def __init__(self, db: Session):
         """
@@ -23,8 +105,17 @@ class PlaybackService:
             db: Database session
         """
         self.db = db
-        self.queue_service = QueueService(db)
-        self.track_service = TrackService(db)
+    
+    # Helper services are built on first use: most playback calls (state, pause,
+    # position, volume) never touch them. Their caches live at module level, so
+    # nothing is lost by creating them per request.
+    @cached_property
+    def queue_service(self) -> QueueService:
+        return QueueService(self.db)
+    
+    @cached_property
+    def track_service(self) -> TrackService:
+        return TrackService(self.db)
 
     def get_next_transition(self, collection_id: str) -> Tuple[Optional[str], Optional[float], bool]:
         """
@@ -33,41 +124,32 @@ class PlaybackService:
         on the same album (consecutive album play).
         """
         state = self.get_playback_state(collection_id)
-        next_queue = self.queue_service.get_next_track(collection_id)
+        next_queue = self.db.query(Queue).options(raiseload("*")).filter(
+            Queue.collection_id == collection_id,
+            Queue.status == QueueStatus.PENDING
+        ).order_by(Queue.position).first()
         if not next_queue or not next_queue.track_id:
             return None, None, False
-        next_track = self.track_service.get_track_by_id(next_queue.track_id)
+        # Next and current track in one round trip
+        current_track_id = state.current_track_id if state else None
+        tracks = self.track_service.get_tracks_by_ids([next_queue.track_id, current_track_id])
+        next_track = tracks.get(next_queue.track_id)
         if not next_track:
             return next_queue.track_id, None, True
-        next_replaygain = None
-        if next_track.extra_metadata:
-            tg = next_track.extra_metadata.get("replaygain_track_gain")
-            ag = next_track.extra_metadata.get("replaygain_album_gain")
-            if tg is not None:
-                next_replaygain = float(tg)
-            elif ag is not None:
-                next_replaygain = float(ag)
-        if not state or not state.current_track_id:
-            return next_queue.track_id, next_replaygain, True
-        current_track = self.track_service.get_track_by_id(state.current_track_id)
+        next_replaygain = next_track.replaygain_track_db
+        if next_replaygain is None:
+            next_replaygain = next_track.replaygain_album_db
+        current_track = tracks.get(current_track_id)
         if not current_track or not current_track.album_id:
             return next_queue.track_id, next_replaygain, True
-        if current_track.album_id != next_track.album_id:
-            return next_queue.track_id, next_replaygain, True
-        album_tracks = self.track_service.get_tracks_by_album(current_track.album_id)
-        current_index = None
-        for i, t in enumerate(album_tracks):
-            if t.id == current_track.id:
-                current_index = i
-                break
-        if current_index is None:
-            return next_queue.track_id, next_replaygain, True
-        next_index = current_index + 1
-        if next_index >= len(album_tracks):
-            return next_queue.track_id, next_replaygain, True
-        if album_tracks[next_index].id != next_track.id:
-            return next_queue.track_id, next_replaygain, True
-        return next_queue.track_id, next_replaygain, False
+        # Consecutive album play: same album and disc, next track number
+        consecutive = (
+            current_track.album_id == next_track.album_id
+            and current_track.disc_number == next_track.disc_number
+            and current_track.track_number is not None
+            and next_track.track_number == current_track.track_number + 1
+        )
+        return next_queue.track_id, next_replaygain, not consecutive
     
     def get_playback_state(self, collection_id: str) -> Optional[PlaybackState]:
         """
@@ -79,9 +161,16 @@ class PlaybackService:
         Returns:
             PlaybackState instance or None
         """
-        return self.db.query(PlaybackState).filter(
-            PlaybackState.collection_id == collection_id
-        ).first()
+        state = self.db.execute(_PLAYBACK_STATE_STMT, {'collection_id': collection_id}).scalar_one_or_none()
+        if state:
+            with _pending_positions_lock:
+                _position_epochs[collection_id] = state.position_epoch
+                pending = _pending_positions.get(collection_id)
+            if pending is not None:
+                position_ms = pending[0]
+                # Overlay the buffered position without marking the row dirty
+                set_committed_value(state, 'current_position_ms', position_ms)
+        return state
     
     def get_or_create_playback_state(self, collection_id: str) -> PlaybackState:
         """
@@ -102,7 +191,7 @@ class PlaybackService:
                 volume=70
             )
             self.db.add(state)
-            self.db.commit()
+            self.db.flush()
         return state
     
     def play(self, collection_id: str) -> Optional[PlaybackState]:
@@ -119,8 +208,9 @@ class PlaybackService:
         
         # If no current track, try to get next from queue
         if not state.current_track_id:
-            next_queue = self.queue_service.get_next_track(collection_id)
+            next_queue = self.queue_service.get_next_track(collection_id, for_update=True)
             if next_queue:
+                _new_position_epoch(state)
                 state.current_track_id = next_queue.track_id
                 state.current_position_ms = 0
                 self.queue_service.mark_playing(next_queue.id)
@@ -129,7 +219,7 @@ class PlaybackService:
                 return state
         
         state.is_playing = True
-        self.db.commit()
+        self.db.flush()
         
         logger.info(f"Started playback for collection {collection_id}")
         return state
@@ -144,10 +234,16 @@ class PlaybackService:
         Returns:
             Updated PlaybackState or None
         """
-        state = self.get_playback_state(collection_id)
+        # Persist any buffered position together with the pause
+        values = {'is_playing': False}
+        position_ms = _take_pending_position(collection_id)
+        if position_ms is not None:
+            values['current_position_ms'] = position_ms
+            values['position_epoch'] = PlaybackState.position_epoch + 1
+        state = self._update_state(collection_id, **values)
         if state:
-            state.is_playing = False
-            self.db.commit()
+            with _pending_positions_lock:
+                _position_epochs[collection_id] = state.position_epoch
             logger.info(f"Paused playback for collection {collection_id}")
         return state
     
@@ -163,10 +259,11 @@ class PlaybackService:
         """
         state = self.get_playback_state(collection_id)
         if state:
+            _new_position_epoch(state)
             state.is_playing = False
             state.current_position_ms = 0
             state.current_track_id = None
-            self.db.commit()
+            self.db.flush()
             logger.info(f"Stopped playback for collection {collection_id}")
         return state
     
@@ -181,23 +278,39 @@ class PlaybackService:
             Updated PlaybackState or None
         """
         state = self.get_or_create_playback_state(collection_id)
+        _new_position_epoch(state)
         
         # Mark current track as played if exists
         if state.current_track_id:
-            current_queue = self.db.query(Queue).filter(
-                Queue.collection_id == collection_id,
-                Queue.track_id == state.current_track_id,
-                Queue.status == QueueStatus.PLAYING
-            ).first()
-            if current_queue:
-                self.queue_service.mark_played(current_queue.id)
-        
-        # Get next track
-        next_queue = self.queue_service.get_next_track(collection_id)
-        if next_queue:
-            state.current_track_id = next_queue.track_id
+            self.db.execute(
+                update(Queue)
+                .where(
+                    Queue.collection_id == collection_id,
+                    Queue.track_id == state.current_track_id,
+                    Queue.status == QueueStatus.PLAYING
+                )
+                .values(status=QueueStatus.PLAYED, played_at=func.now())
+            )
+        
+        # Promote the next pending item in the same statement that selects it
+        next_id = (
+            select(Queue.id)
+            .where(Queue.collection_id == collection_id, Queue.status == QueueStatus.PENDING)
+            .order_by(Queue.position)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        promoted = self.db.execute(
+            update(Queue)
+            .where(Queue.id == next_id)
+            .values(status=QueueStatus.PLAYING)
+            .returning(Queue.track_id)
+        ).first()
+        
+        if promoted:
+            state.current_track_id = promoted.track_id
             state.current_position_ms = 0
-            self.queue_service.mark_playing(next_queue.id)
             logger.info(f"Skipped to next track for collection {collection_id}")
         else:
             # No more tracks in queue
@@ -206,25 +319,26 @@ class PlaybackService:
             state.is_playing = False
             logger.info(f"No more tracks in queue for collection {collection_id}")
         
-        self.db.commit()
+        self.db.flush()
         return state
     
-    def update_position(self, collection_id: str, position_ms: int) -> Optional[PlaybackState]:
+    def update_position(self, collection_id: str, position_ms: int) -> int:
         """
         Update current playback position
         
+        The position is buffered in memory and written by flush_positions (run
+        periodically, and on pause); reads see the buffered value immediately.
+        
         Args:
             collection_id: Collection UUID
             position_ms: Position in milliseconds
             
         Returns:
-            Updated PlaybackState or None
+            The buffered position in milliseconds
         """
-        state = self.get_playback_state(collection_id)
-        if state:
-            state.current_position_ms = position_ms
-            self.db.commit()
-        return state
+        with _pending_positions_lock:
+            _pending_positions[collection_id] = (position_ms, _position_epochs.get(collection_id))
+        return position_ms
     
     def set_volume(self, collection_id: str, volume: int) -> Optional[PlaybackState]:
         """
@@ -237,7 +351,28 @@ class PlaybackService:
         Returns:
             Updated PlaybackState or None
         """
-        state = self.get_or_create_playback_state(collection_id)
-        state.volume = max(0, min(100, volume))  # Clamp to 0-100
-        self.db.commit()
+        volume = max(0, min(100, volume))  # Clamp to 0-100
+        state = self._update_state(collection_id, volume=volume)
+        if not state:
+            state = self.get_or_create_playback_state(collection_id)
+            state.volume = volume
+            self.db.flush()
         return state
+    
+    def _update_state(self, collection_id: str, **values) -> Optional[PlaybackState]:
+        """
+        Update playback state columns with a single UPDATE ... RETURNING (no prior SELECT)
+        
+        Args:
+            collection_id: Collection UUID
+            **values: Column values to set
+            
+        Returns:
+            Updated PlaybackState or None if the collection has no playback state yet
+        """
+        return self.db.scalars(
+            update(PlaybackState)
+            .where(PlaybackState.collection_id == collection_id)
+            .values(**values)
+            .returning(PlaybackState)
+        ).first()
@@ -1,17 +1,41 @@
 """Queue service for managing playback queue"""
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, raiseload, selectinload
 from typing import List, Optional
-from datetime import datetime
 import logging
 
-from app.models.queue import Queue, QueueStatus
+from app.models.queue import Queue, QueueStatus, ACTIVE_STATUS_SQL
 from app.models.track import Track
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+# Hot reads built once at import; executed with parameters only so the compiled form is reused
+_NEXT_TRACK_STMT = (
+    select(Queue)
+    .where(Queue.collection_id == bindparam('collection_id'), Queue.status == QueueStatus.PENDING)
+    .order_by(Queue.position)
+    .limit(1)
+)
+_NEXT_TRACK_FOR_UPDATE_STMT = _NEXT_TRACK_STMT.with_for_update(skip_locked=True)
+_FULL_QUEUE_STMT = (
+    select(Queue)
+    .where(Queue.collection_id == bindparam('collection_id'))
+    .order_by(Queue.position)
+)
+_ACTIVE_QUEUE_STMT = _FULL_QUEUE_STMT.where(Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING]))
+
+
 class QueueService:
-    """Service for queue-related operations"""
+    """
+    Service for queue-related operations
+    
+    Methods flush but never commit; the caller controls the transaction scope
+    (get_db commits once per request).
+    """
     
     def __init__(self, db: Session):
         """
@@ -33,34 +57,29 @@ class QueueService:
         Returns:
             Queue instance, or None if track already in queue or on error
         """
-        existing = self.db.query(Queue).filter(
+        active = [QueueStatus.PENDING, QueueStatus.PLAYING]
+        # Next position computed in the same statement: 1 if the queue is empty
+        next_position = select(func.coalesce(func.max(Queue.position), 0) + 1).where(
             Queue.collection_id == collection_id,
-            Queue.track_id == track_id,
-            Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING])
-        ).first()
-        if existing:
-            logger.debug(f"Track {track_id} already in queue for collection {collection_id}, skipping duplicate")
-            return None
-
-        # Get the maximum position value from pending/playing tracks
-        from sqlalchemy import func
-        max_position_result = self.db.query(func.max(Queue.position)).filter(
-            Queue.collection_id == collection_id,
-            Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING])
-        ).scalar()
-
-        # If queue is empty, start at position 1, otherwise increment max position
-        max_position = max_position_result if max_position_result is not None else 0
+            Queue.status.in_(active)
+        ).scalar_subquery()
 
-        queue_item = Queue(
+        dialect_insert = pg_insert if self.db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        # The partial unique index ux_queue_active_track turns a duplicate into a no-op
+        stmt = dialect_insert(Queue).values(
             collection_id=collection_id,
             track_id=track_id,
-            position=max_position + 1,
+            position=next_position,
             status=QueueStatus.PENDING
-        )
+        ).on_conflict_do_nothing(
+            index_elements=['collection_id', 'track_id'],
+            index_where=ACTIVE_STATUS_SQL
+        ).returning(Queue)
 
-        self.db.add(queue_item)
-        self.db.commit()
+        queue_item = self.db.scalars(stmt).first()
+        if not queue_item:
+            logger.debug(f"Track {track_id} already in queue for collection {collection_id}, skipping duplicate")
+            return None
 
         logger.info(f"Added track {track_id} to queue at position {queue_item.position}")
         return queue_item
@@ -76,44 +95,80 @@ class QueueService:
         Returns:
             Number of tracks added
         """
-        count = 0
-        for track_id in track_ids:
-            if self.add_to_queue(collection_id, track_id):
-                count += 1
-        return count
+        active = [QueueStatus.PENDING, QueueStatus.PLAYING]
+        
+        # Skip tracks already in the queue (pending or playing) and repeats within track_ids
+        existing = {
+            track_id for (track_id,) in self.db.query(Queue.track_id).filter(
+                Queue.collection_id == collection_id,
+                Queue.track_id.in_(track_ids),
+                Queue.status.in_(active)
+            ).all()
+        }
+        new_track_ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id not in existing]
+        if not new_track_ids:
+            return 0
+        
+        max_position = self.db.query(func.max(Queue.position)).filter(
+            Queue.collection_id == collection_id,
+            Queue.status.in_(active)
+        ).scalar() or 0
+        
+        dialect_insert = pg_insert if self.db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        # As in add_to_queue, a track queued concurrently since the SELECT above is
+        # skipped by ux_queue_active_track instead of failing the whole insert
+        stmt = dialect_insert(Queue).values([
+            {
+                'collection_id': collection_id,
+                'track_id': track_id,
+                'position': max_position + index,
+                'status': QueueStatus.PENDING,
+            }
+            for index, track_id in enumerate(new_track_ids, start=1)
+        ]).on_conflict_do_nothing(
+            index_elements=['collection_id', 'track_id'],
+            index_where=ACTIVE_STATUS_SQL
+        ).returning(Queue.id)
+        added = len(self.db.execute(stmt).all())
+        
+        logger.info(f"Added {added} tracks to queue for collection {collection_id}")
+        return added
     
-    def get_queue(self, collection_id: str, include_played: bool = False) -> List[Queue]:
+    def get_queue(self, collection_id: str, include_played: bool = False, with_tracks: bool = False) -> List[Queue]:
         """
         Get queue for a collection
         
         Args:
             collection_id: Collection UUID
             include_played: Whether to include played items
+            with_tracks: Eager-load each item's track and album (one SELECT ... IN per
+                relationship) for callers that render them; otherwise item.track is a lazy load
             
         Returns:
             List of Queue instances ordered by position
         """
-        query = self.db.query(Queue).filter(Queue.collection_id == collection_id)
-        
-        if not include_played:
-            query = query.filter(Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING]))
+        stmt = _ACTIVE_QUEUE_STMT if not include_played else _FULL_QUEUE_STMT
+        if with_tracks:
+            stmt = stmt.options(selectinload(Queue.track).selectinload(Track.album))
+        if settings.debug_raiseload:
+            stmt = stmt.options(raiseload("*"))
         
-        return query.order_by(Queue.position).all()
+        return list(self.db.execute(stmt, {'collection_id': collection_id}).scalars())
     
-    def get_next_track(self, collection_id: str) -> Optional[Queue]:
+    def get_next_track(self, collection_id: str, for_update: bool = False) -> Optional[Queue]:
         """
         Get next pending track in queue
         
         Args:
             collection_id: Collection UUID
+            for_update: Lock the row (SELECT ... FOR UPDATE SKIP LOCKED) so concurrent
+                callers about to mark it playing cannot claim the same item
             
         Returns:
             Next Queue item or None if queue is empty
         """
-        return self.db.query(Queue).filter(
-            Queue.collection_id == collection_id,
-            Queue.status == QueueStatus.PENDING
-        ).order_by(Queue.position).first()
+        stmt = _NEXT_TRACK_FOR_UPDATE_STMT if for_update else _NEXT_TRACK_STMT
+        return self.db.execute(stmt, {'collection_id': collection_id}).scalar_one_or_none()
     
     def mark_playing(self, queue_id: str) -> Optional[Queue]:
         """
@@ -125,12 +180,12 @@ class QueueService:
         Returns:
             Updated Queue instance or None
         """
-        queue_item = self.db.query(Queue).filter(Queue.id == queue_id).first()
-        if queue_item:
-            queue_item.status = QueueStatus.PLAYING
-            self.db.commit()
-            return queue_item
-        return None
+        return self.db.scalars(
+            update(Queue)
+            .where(Queue.id == queue_id)
+            .values(status=QueueStatus.PLAYING)
+            .returning(Queue)
+        ).first()
     
     def mark_played(self, queue_id: str) -> Optional[Queue]:
         """
@@ -142,13 +197,12 @@ class QueueService:
         Returns:
             Updated Queue instance or None
         """
-        queue_item = self.db.query(Queue).filter(Queue.id == queue_id).first()
-        if queue_item:
-            queue_item.status = QueueStatus.PLAYED
-            queue_item.played_at = datetime.utcnow()
-            self.db.commit()
-            return queue_item
-        return None
+        return self.db.scalars(
+            update(Queue)
+            .where(Queue.id == queue_id)
+            .values(status=QueueStatus.PLAYED, played_at=func.now())
+            .returning(Queue)
+        ).first()
     
     def remove_from_queue(self, queue_id: str) -> bool:
         """
@@ -164,10 +218,11 @@ class QueueService:
         if queue_item:
             collection_id = queue_item.collection_id
             self.db.delete(queue_item)
+            self.db.flush()
             
             # Reorder remaining items
             self._reorder_queue(collection_id)
-            self.db.commit()
+            self.db.flush()
             return True
         return False
     
@@ -182,14 +237,13 @@ class QueueService:
         Returns:
             Number of items removed
         """
-        query = self.db.query(Queue).filter(Queue.collection_id == collection_id)
+        stmt = delete(Queue).where(Queue.collection_id == collection_id)
         
         if not clear_played:
-            query = query.filter(Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING]))
+            stmt = stmt.where(Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING]))
         
-        count = query.count()
-        query.delete()
-        self.db.commit()
+        # One DELETE; rowcount is the number removed. Skip scanning the identity map.
+        count = self.db.execute(stmt.execution_options(synchronize_session=False)).rowcount
         
         logger.info(f"Cleared {count} items from queue for collection {collection_id}")
         return count
@@ -198,16 +252,29 @@ class QueueService:
         """
         Reorder queue positions after removal
 
+        Renumbers pending/playing items 1..N with a single UPDATE ... FROM over a
+        ROW_NUMBER() window (SQLite >= 3.33 or PostgreSQL).
+
         Args:
             collection_id: Collection UUID
         """
-        queue_items = self.db.query(Queue).filter(
-            Queue.collection_id == collection_id,
-            Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING])
-        ).order_by(Queue.position).all()
-
-        for index, item in enumerate(queue_items, start=1):
-            item.position = index
+        ranked = (
+            select(
+                Queue.id.label('id'),
+                func.row_number().over(order_by=Queue.position).label('rn')
+            )
+            .where(
+                Queue.collection_id == collection_id,
+                Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING])
+            )
+            .subquery()
+        )
+        self.db.execute(
+            update(Queue)
+            .where(Queue.id == ranked.c.id)
+            .values(position=ranked.c.rn)
+            .execution_options(synchronize_session='fetch')
+        )
 
     def reorder_queue(self, collection_id: str, ordered_queue_ids: List[str]) -> bool:
         """
@@ -223,19 +290,24 @@ class QueueService:
         """
         if not ordered_queue_ids:
             return True
-        items = (
-            self.db.query(Queue)
+        found = (
+            self.db.query(func.count(Queue.id))
             .filter(
                 Queue.collection_id == collection_id,
                 Queue.id.in_(ordered_queue_ids),
                 Queue.status.in_([QueueStatus.PENDING, QueueStatus.PLAYING]),
             )
-            .all()
+            .scalar()
         )
-        if len(items) != len(ordered_queue_ids):
+        if found != len(ordered_queue_ids):
             return False
-        id_to_item = {item.id: item for item in items}
-        for position, qid in enumerate(ordered_queue_ids, start=1):
-            id_to_item[qid].position = position
-        self.db.commit()
+        # Bulk UPDATE by primary key: one prepared statement executed for every row
+        self.db.execute(
+            update(Queue),
+            [
+                {'id': qid, 'position': position}
+                for position, qid in enumerate(ordered_queue_ids, start=1)
+            ]
+        )
+        self.db.flush()
         return True
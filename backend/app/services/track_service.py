@@ -1,8 +1,12 @@
 """Track service for managing track operations"""
+from sqlalchemy import bindparam, event, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
+from cachetools import TTLCache
+import threading
 import logging
+import os
 
 from app.models.track import Track
 from app.models.album import Album
@@ -10,9 +14,60 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Library root resolved once; get_track_file_path joins onto the str form
+LIBRARY_PATH = Path(settings.music_library_path)
+LIBRARY_PATH_STR = str(LIBRARY_PATH)
+
+# (album_id, enabled_only) -> [track_id, ...] in album order
+_album_tracks_cache = TTLCache(maxsize=512, ttl=60)
+_album_tracks_lock = threading.Lock()
+
+# track_id -> full file path str (None if the file was missing) for audio streaming
+_file_path_cache = TTLCache(maxsize=4096, ttl=30)
+_file_path_lock = threading.Lock()
+
+
+_TRACK_BY_ID_STMT = select(Track).where(Track.id == bindparam('track_id'))
+
+
+# Session.info key holding the album ids to drop from the cache once the session commits
+_PENDING_INVALIDATIONS_KEY = 'album_tracks_invalidations'
+
+
+def _drop_album_tracks(album_id: str) -> None:
+    with _album_tracks_lock:
+        _album_tracks_cache.pop((album_id, True), None)
+        _album_tracks_cache.pop((album_id, False), None)
+
+
+def invalidate_album_tracks(db: Session, album_id: str) -> None:
+    """
+    Drop cached track lists for an album (call after any change to its tracks)
+    
+    The lists are dropped now and again after db commits, so a request that reads
+    the old committed rows before the commit cannot leave them cached.
+    
+    Args:
+        db: Session the change was made in
+        album_id: Album UUID
+    """
+    _drop_album_tracks(album_id)
+    db.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).add(album_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_album_tracks(session: Session) -> None:
+    for album_id in session.info.pop(_PENDING_INVALIDATIONS_KEY, ()):
+        _drop_album_tracks(album_id)
+
 
 class TrackService:
-    """Service for track-related operations"""
+    """
+    Service for track-related operations
+    
+    Methods flush but never commit; the caller controls the transaction scope
+    (get_db commits once per request).
+    """
     
     def __init__(self, db: Session):
         """
@@ -22,7 +77,7 @@ class TrackService:
             db: Database session
         """
         self.db = db
-        self.library_path = Path(settings.music_library_path)
+        self.library_path = LIBRARY_PATH
     
     def get_track_by_id(self, track_id: str) -> Optional[Track]:
         """
@@ -34,7 +89,25 @@ class TrackService:
         Returns:
             Track instance or None
         """
-        return self.db.query(Track).filter(Track.id == track_id).first()
+        return self.db.execute(_TRACK_BY_ID_STMT, {'track_id': track_id}).scalar_one_or_none()
+    
+    def get_tracks_by_ids(self, track_ids: List[str]) -> Dict[str, Track]:
+        """
+        Get several tracks with one WHERE id IN (...) query per 1000 ids
+        
+        Args:
+            track_ids: Track UUIDs (duplicates and None are ignored)
+            
+        Returns:
+            Dict of track id -> Track for the tracks that exist
+        """
+        ids = [track_id for track_id in dict.fromkeys(track_ids) if track_id]
+        tracks = {}
+        for start in range(0, len(ids), 1000):
+            batch = ids[start:start + 1000]
+            for track in self.db.query(Track).filter(Track.id.in_(batch)).all():
+                tracks[track.id] = track
+        return tracks
     
     def get_tracks_by_album(self, album_id: str, enabled_only: bool = True) -> List[Track]:
         """
@@ -54,26 +127,64 @@ class TrackService:
         
         return query.order_by(Track.disc_number, Track.track_number).all()
     
-    def get_track_file_path(self, track_id: str) -> Optional[Path]:
+    def get_track_ids_by_album(self, album_id: str, enabled_only: bool = True) -> List[str]:
+        """
+        Get an album's track IDs in album order without loading Track rows
+        
+        Results are cached in-process for up to 60 seconds; writers invalidate via
+        invalidate_album_tracks.
+        
+        Args:
+            album_id: Album UUID
+            enabled_only: If True, only include enabled, non-archived tracks (default: True)
+            
+        Returns:
+            List of track UUIDs ordered by disc and track number
+        """
+        key = (album_id, enabled_only)
+        with _album_tracks_lock:
+            cached = _album_tracks_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        query = self.db.query(Track.id).filter(Track.album_id == album_id)
+        if enabled_only:
+            query = query.filter(Track.enabled == True, Track.archived == False)
+        track_ids = [track_id for (track_id,) in query.order_by(Track.disc_number, Track.track_number).all()]
+        
+        with _album_tracks_lock:
+            _album_tracks_cache[key] = track_ids
+        return track_ids
+    
+    def get_track_file_path(self, track_id: str) -> Optional[str]:
         """
         Get full filesystem path to track's FLAC file
         
+        Results (including missing files) are cached per track for 30 seconds so
+        repeated range requests skip the database lookup and the stat.
+        
         Args:
             track_id: Track UUID
             
         Returns:
             Full path to FLAC file or None if not found
         """
+        with _file_path_lock:
+            if track_id in _file_path_cache:
+                return _file_path_cache[track_id]
+        
         track = self.get_track_by_id(track_id)
         if not track:
             return None
         
-        full_path = self.library_path / track.file_path
+        full_path = LIBRARY_PATH_STR + os.sep + track.file_path
         
-        if not full_path.exists():
+        if not os.path.isfile(full_path):
             logger.error(f"Track file not found: {full_path}")
-            return None
+            full_path = None
         
+        with _file_path_lock:
+            _file_path_cache[track_id] = full_path
         return full_path
     
     def toggle_track_enabled(self, track_id: str) -> Optional[Track]:
@@ -89,7 +200,8 @@ class TrackService:
         track = self.get_track_by_id(track_id)
         if track:
             track.enabled = not track.enabled
-            self.db.commit()
+            self.db.flush()
+            invalidate_album_tracks(self.db, track.album_id)
             return track
         return None
     
@@ -104,6 +216,7 @@ class TrackService:
         Returns:
             List of matching Track instances
         """
+        # PostgreSQL serves ILIKE from the pg_trgm GIN indexes on title/artist
         search_pattern = f"%{query}%"
         return self.db.query(Track).filter(
             (Track.title.ilike(search_pattern)) | 
@@ -1,4 +1,5 @@
 """FLAC metadata extraction utilities"""
+import hashlib
 import os
 import re
 from pathlib import Path
@@ -8,11 +9,29 @@ from mutagen.id3 import ID3, APIC
 from PIL import Image
 import io
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 
 from app.config import settings
 
+# Optional: libvips decodes JPEGs pre-shrunk and resizes in streaming tiles
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
 logger = logging.getLogger(__name__)
 
+# Parentheses containing 'remaster' or 'remastered' (case-insensitive)
+# Example matches: "(2014 Remaster)", "(Remastered 2002)", "(2001 Remastered Version)"
+_REMASTER_RE = re.compile(r'\s*\([^)]*remaster[^)]*\)', re.IGNORECASE)
+_WS_RE = re.compile(r'\s+')
+_DISC_RE = re.compile(r'(?:Disc|Disk|CD)\s*(\d+)', re.IGNORECASE)
+# Cover art filenames looked for in an album directory, in priority order (lowercase)
+_COVER_NAMES = ('cover.jpg', 'cover.png', 'folder.jpg', 'folder.png',
+                'front.jpg', 'front.png', 'album.jpg', 'album.png')
+
 
 def sanitize_track_title(title: str) -> str:
     """
@@ -27,15 +46,77 @@ def sanitize_track_title(title: str) -> str:
     Returns:
         Sanitized track title with remaster annotations removed
     """
-    # Pattern matches parentheses containing 'remaster' or 'remastered' (case-insensitive)
-    # Example matches: "(2014 Remaster)", "(Remastered 2002)", "(2001 Remastered Version)"
-    pattern = r'\s*\([^)]*remaster[^)]*\)'
-    sanitized = re.sub(pattern, '', title, flags=re.IGNORECASE)
+    sanitized = _REMASTER_RE.sub('', title)
     
     # Clean up any extra whitespace
-    sanitized = ' '.join(sanitized.split())
+    return _WS_RE.sub(' ', sanitized).strip()
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Write data to path straight from the buffer (no file-object copy)."""
+    view = memoryview(data)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _vorbis_tags(audio: FLAC) -> Dict[str, List[str]]:
+    """
+    Snapshot a FLAC's Vorbis comments into a plain dict
+    
+    mutagen's VCommentDict lookups scan the whole comment list case-insensitively;
+    this builds lowercase key -> list of values once so later lookups are O(1).
     
-    return sanitized.strip()
+    Args:
+        audio: Parsed FLAC file
+        
+    Returns:
+        Dict of lowercase tag name -> list of values (in file order)
+    """
+    tags: Dict[str, List[str]] = {}
+    for key, value in audio.tags or []:
+        tags.setdefault(key.lower(), []).append(value)
+    return tags
+
+
+def _is_flac_entry(entry: os.DirEntry) -> bool:
+    """True for visible .flac files (skips dotfiles such as macOS '._' resource forks)."""
+    name = entry.name
+    return not name.startswith('.') and name.lower().endswith('.flac') and entry.is_file()
+
+
+def _list_flacs(path: Path) -> List[Path]:
+    """
+    List FLAC files in a directory with a single scandir pass
+    
+    Args:
+        path: Directory to list
+        
+    Returns:
+        Sorted list of FLAC file paths
+    """
+    with os.scandir(path) as entries:
+        return sorted((Path(entry.path) for entry in entries if _is_flac_entry(entry)), key=lambda p: p.name)
+
+
+def _extract_album_worker(library_path: str, album_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Process-pool entry point for MetadataExtractor.scan_library
+    
+    Args:
+        library_path: Path to music library root
+        album_path: Path to album directory
+        
+    Returns:
+        Tuple of (album metadata or None, error message or None)
+    """
+    try:
+        return MetadataExtractor(library_path).extract_album_metadata(Path(album_path)), None
+    except Exception as e:
+        return None, str(e)
 
 
 class MetadataExtractor:
@@ -63,22 +144,34 @@ class MetadataExtractor:
             logger.error(f"Music library path does not exist: {self.library_path}")
             return albums
         
-        # Walk through Artist/Album structure
-        for artist_dir in self.library_path.iterdir():
-            if not artist_dir.is_dir() or artist_dir.name.startswith('.'):
-                continue
-                
-            for album_dir in artist_dir.iterdir():
-                if not album_dir.is_dir() or album_dir.name.startswith('.'):
-                    continue
-                
-                try:
-                    album_metadata = self.extract_album_metadata(album_dir)
-                    if album_metadata:
-                        albums.append(album_metadata)
-                        logger.info(f"Found album: {album_metadata['artist']} - {album_metadata['title']}")
-                except Exception as e:
-                    logger.error(f"Error processing album {album_dir}: {e}")
+        # Walk through Artist/Album structure: album directories are the subdirectories
+        # seen at artist level, so the walk never descends into the albums themselves
+        album_dirs = []
+        root_depth = str(self.library_path).rstrip(os.sep).count(os.sep)
+        for dirpath, dirnames, _ in os.walk(self.library_path, followlinks=True):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            if dirpath.rstrip(os.sep).count(os.sep) - root_depth == 1:
+                album_dirs.extend(Path(dirpath, name) for name in dirnames)
+                dirnames[:] = []
+        
+        # Tag parsing is CPU-bound pure Python: extract albums in parallel worker processes.
+        # Spawned, not forked: this runs inside the multi-threaded server, and a forked
+        # child can deadlock on a lock another thread held at fork time.
+        with ProcessPoolExecutor(
+            max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(
+                _extract_album_worker,
+                repeat(str(self.library_path)),
+                [str(album_dir) for album_dir in album_dirs],
+                chunksize=8
+            )
+            for album_dir, (album_metadata, error) in zip(album_dirs, results):
+                if error:
+                    logger.error(f"Error processing album {album_dir}: {error}")
+                elif album_metadata:
+                    albums.append(album_metadata)
+                    logger.info(f"Found album: {album_metadata['artist']} - {album_metadata['title']}")
         
         return albums
     
@@ -102,9 +195,9 @@ class MetadataExtractor:
         flac_files = []
         if has_multi_disc:
             for disc_dir in disc_dirs:
-                flac_files.extend(sorted(disc_dir.glob("*.flac")))
+                flac_files.extend(_list_flacs(disc_dir))
         else:
-            flac_files = sorted(album_path.glob("*.flac"))
+            flac_files = _list_flacs(album_path)
         
         if not flac_files:
             logger.warning(f"No FLAC files found in {album_path}")
@@ -113,9 +206,10 @@ class MetadataExtractor:
         # Extract metadata from first track to get album info
         first_track = FLAC(str(flac_files[0]))
         
-        album_title = first_track.get('album', [album_path.name])[0]
-        album_artist = first_track.get('albumartist', first_track.get('artist', [album_path.parent.name]))[0]
-        year = first_track.get('date', [None])[0]
+        first_tags = _vorbis_tags(first_track)
+        album_title = first_tags.get('album', [album_path.name])[0]
+        album_artist = first_tags.get('albumartist', first_tags.get('artist', [album_path.parent.name]))[0]
+        year = first_tags.get('date', [None])[0]
         
         # Try to parse year if it's a full date
         if year and len(str(year)) > 4:
@@ -125,19 +219,24 @@ class MetadataExtractor:
         except (ValueError, TypeError):
             year = None
         
-        # Find cover art
-        cover_art_path = self.extract_cover_art(album_path, flac_files[0])
+        # Find cover art (reuses the parsed first track for embedded pictures)
+        cover_art_path = self.extract_cover_art(album_path, flac_files[0], audio=first_track)
         
         # Genre from first track (FLAC/Vorbis: can be multiple values)
-        genre_raw = first_track.get('genre', [])
+        genre_raw = first_tags.get('genre', [])
         genres = [g.strip() for g in genre_raw if g and str(g).strip()] if genre_raw else []
         
         # Extract all tracks
-        tracks = []
-        for flac_file in flac_files:
-            track_metadata = self.extract_track_metadata(flac_file, album_path)
-            if track_metadata:
-                tracks.append(track_metadata)
+        # First track reuses the parsed FLAC; the rest are read on a small thread pool
+        # to overlap file I/O (map keeps album order)
+        track_results = [self.extract_track_metadata(flac_files[0], album_path, audio=first_track)]
+        if len(flac_files) > 1:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                track_results.extend(executor.map(
+                    lambda flac_file: self.extract_track_metadata(flac_file, album_path),
+                    flac_files[1:]
+                ))
+        tracks = [track_metadata for track_metadata in track_results if track_metadata]
         
         extra = {
             'disc_count': len(disc_dirs) if has_multi_disc else 1,
@@ -157,37 +256,37 @@ class MetadataExtractor:
             'tracks': tracks
         }
     
-    def extract_track_metadata(self, track_path: Path, album_path: Path) -> Optional[Dict[str, Any]]:
+    def extract_track_metadata(self, track_path: Path, album_path: Path, audio: Optional[FLAC] = None) -> Optional[Dict[str, Any]]:
         """
         Extract metadata from a single FLAC file
         
         Args:
             track_path: Path to FLAC file
             album_path: Path to album directory (for relative path calculation)
+            audio: Already-parsed FLAC for track_path (opened here if None)
             
         Returns:
             Dictionary with track metadata or None on error
         """
         try:
-            audio = FLAC(str(track_path))
+            if audio is None:
+                audio = FLAC(str(track_path))
+            tags = _vorbis_tags(audio)
             
             # Get relative path from library root
             relative_file_path = str(track_path.relative_to(self.library_path))
             
             # Determine disc number
             disc_number = 1
-            if 'Disc' in str(track_path.parent.name) or 'Disk' in str(track_path.parent.name):
-                # Extract disc number from folder name (e.g., "Disc 1" or "Disc 2")
-                disc_folder = track_path.parent.name
-                for word in disc_folder.split():
-                    if word.isdigit():
-                        disc_number = int(word)
-                        break
+            # Extract disc number from folder name (e.g., "Disc 1", "Disk 2" or "CD 2")
+            disc_match = _DISC_RE.search(track_path.parent.name)
+            if disc_match:
+                disc_number = int(disc_match.group(1))
             
             # Try to get disc number from metadata
-            if 'discnumber' in audio:
+            if 'discnumber' in tags:
                 try:
-                    disc_num_str = str(audio['discnumber'][0])
+                    disc_num_str = str(tags['discnumber'][0])
                     # Handle formats like "1/2" or just "1"
                     if '/' in disc_num_str:
                         disc_number = int(disc_num_str.split('/')[0])
@@ -198,9 +297,9 @@ class MetadataExtractor:
             
             # Get track number
             track_number = 0
-            if 'tracknumber' in audio:
+            if 'tracknumber' in tags:
                 try:
-                    track_num_str = str(audio['tracknumber'][0])
+                    track_num_str = str(tags['tracknumber'][0])
                     # Handle formats like "1/12" or just "1"
                     if '/' in track_num_str:
                         track_number = int(track_num_str.split('/')[0])
@@ -209,10 +308,10 @@ class MetadataExtractor:
                 except (ValueError, IndexError):
                     pass
             
-            title = audio.get('title', [track_path.stem])[0]
+            title = tags.get('title', [track_path.stem])[0]
             # Sanitize title to remove remaster annotations
             title = sanitize_track_title(title)
-            artist = audio.get('artist', ['Unknown'])[0]
+            artist = tags.get('artist', ['Unknown'])[0]
             
             # Duration in milliseconds
             duration_ms = int(audio.info.length * 1000) if audio.info else 0
@@ -229,14 +328,14 @@ class MetadataExtractor:
 
             replaygain_track_db = None
             replaygain_album_db = None
-            if 'REPLAYGAIN_TRACK_GAIN' in audio:
+            if 'replaygain_track_gain' in tags:
                 try:
-                    replaygain_track_db = parse_replaygain(audio['REPLAYGAIN_TRACK_GAIN'][0])
+                    replaygain_track_db = parse_replaygain(tags['replaygain_track_gain'][0])
                 except (ValueError, IndexError, TypeError):
                     pass
-            if 'REPLAYGAIN_ALBUM_GAIN' in audio:
+            if 'replaygain_album_gain' in tags:
                 try:
-                    replaygain_album_db = parse_replaygain(audio['REPLAYGAIN_ALBUM_GAIN'][0])
+                    replaygain_album_db = parse_replaygain(tags['replaygain_album_gain'][0])
                 except (ValueError, IndexError, TypeError):
                     pass
 
@@ -275,61 +374,97 @@ class MetadataExtractor:
         """
         disc_dirs = []
         
-        for item in album_path.iterdir():
-            if item.is_dir() and ('Disc' in item.name or 'Disk' in item.name or 'CD' in item.name):
-                # Check if directory contains FLAC files
-                if list(item.glob("*.flac")):
-                    disc_dirs.append(item)
+        with os.scandir(album_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if ('Disc' in name or 'Disk' in name or 'CD' in name) and entry.is_dir():
+                    # Check if directory contains FLAC files (stop at the first one)
+                    with os.scandir(entry.path) as disc_entries:
+                        if any(_is_flac_entry(e) for e in disc_entries):
+                            disc_dirs.append(Path(entry.path))
         
         disc_dirs.sort(key=lambda x: x.name)
         return len(disc_dirs) > 0, disc_dirs
     
-    def extract_cover_art(self, album_path: Path, sample_track: Path) -> Optional[str]:
+    def extract_cover_art(self, album_path: Path, sample_track: Path, audio: Optional[FLAC] = None) -> Optional[str]:
         """
         Extract cover art from album directory or embedded in FLAC
         
         Args:
             album_path: Path to album directory
             sample_track: Path to a sample FLAC file to extract embedded art
+            audio: Already-parsed FLAC for sample_track (opened here if None)
             
         Returns:
             Relative path to cover art or None
         """
-        # Check for common cover art filenames in album directory
-        cover_names = ['cover.jpg', 'cover.png', 'folder.jpg', 'folder.png', 
-                       'front.jpg', 'front.png', 'album.jpg', 'album.png']
+        # One directory read instead of a stat per candidate name
+        files = {}
+        artwork_dir = None
+        with os.scandir(album_path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    files[entry.name.lower()] = entry.path
+                elif entry.name == 'ARTWORK' and entry.is_dir():
+                    artwork_dir = entry.path
         
-        # First check in album directory
-        for cover_name in cover_names:
-            cover_path = album_path / cover_name
-            if cover_path.exists():
-                return str(cover_path.relative_to(self.library_path))
+        # First check for common cover art filenames in album directory
+        for cover_name in _COVER_NAMES:
+            if cover_name in files:
+                return str(Path(files[cover_name]).relative_to(self.library_path))
         
         # Check in ARTWORK subdirectory (as seen in your library)
-        artwork_dir = album_path / 'ARTWORK'
-        if artwork_dir.exists():
-            for cover_file in artwork_dir.glob('*'):
-                if cover_file.suffix.lower() in ['.jpg', '.jpeg', '.png']:
-                    return str(cover_file.relative_to(self.library_path))
+        if artwork_dir:
+            with os.scandir(artwork_dir) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1].lower() in ('.jpg', '.jpeg', '.png'):
+                        return str(Path(entry.path).relative_to(self.library_path))
         
         # Try to extract embedded cover art from FLAC
         try:
-            audio = FLAC(str(sample_track))
+            if audio is None:
+                audio = FLAC(str(sample_track))
             if audio.pictures:
                 # Save embedded cover art
                 picture = audio.pictures[0]
                 cover_filename = 'cover.jpg'
                 cover_path = album_path / cover_filename
                 
-                with open(cover_path, 'wb') as f:
-                    f.write(picture.data)
-                
+                self._store_embedded_cover(picture.data, cover_path)
                 return str(cover_path.relative_to(self.library_path))
         except Exception as e:
             logger.warning(f"Could not extract embedded cover art from {sample_track}: {e}")
         
         return None
     
+    def _store_embedded_cover(self, data: bytes, cover_path: Path) -> None:
+        """
+        Write embedded cover art to cover_path, deduplicated across albums
+        
+        The image is stored once under {library}/.covers/ keyed by its blake2b digest
+        and hardlinked into the album directory, so identical art shared by many
+        albums takes the disk space of one file. Falls back to a plain write where
+        hardlinks are not supported (e.g. exFAT, or .covers on another device).
+        
+        Args:
+            data: Image bytes from the FLAC picture block
+            cover_path: Destination path in the album directory
+        """
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        canonical = self.library_path / '.covers' / f'{digest}.jpg'
+        try:
+            if not canonical.exists():
+                canonical.parent.mkdir(exist_ok=True)
+                # Write to a per-process temp name, then rename: scans run in parallel processes
+                tmp_path = canonical.with_name(f'{digest}.{os.getpid()}.tmp')
+                _write_bytes(tmp_path, data)
+                os.replace(tmp_path, canonical)
+            if cover_path.exists():
+                cover_path.unlink()
+            os.link(canonical, cover_path)
+        except OSError:
+            _write_bytes(cover_path, data)
+    
     def create_thumbnail(self, image_path: Path, thumbnail_path: Path, size: Tuple[int, int] = (300, 300)) -> bool:
         """
         Create a thumbnail from an image
@@ -343,7 +478,13 @@ class MetadataExtractor:
             True if successful, False otherwise
         """
         try:
+            if pyvips is not None:
+                img = pyvips.Image.thumbnail(str(image_path), size[0], height=size[1])
+                img.jpegsave(str(thumbnail_path), Q=85, strip=True)
+                return True
             with Image.open(image_path) as img:
+                # Let libjpeg decode at a reduced DCT scale before the LANCZOS pass
+                img.draft('RGB', size)
                 img.thumbnail(size, Image.Resampling.LANCZOS)
                 img.save(thumbnail_path, "JPEG", quality=85)
             return True
@@ -0,0 +1,30 @@
+"""add_position_epoch_to_playback_state
+
+Revision ID: a7c9e1b3d5f7
+Revises: f2b4d6f8a0c2
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1b3d5f7'
+down_revision: Union[str, Sequence[str], None] = 'f2b4d6f8a0c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('playback_state') as batch_op:
+        batch_op.add_column(sa.Column('position_epoch', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('playback_state') as batch_op:
+        batch_op.drop_column('position_epoch')
@@ -0,0 +1,69 @@
+"""add_collection_album_tracks
+
+Revision ID: b7c1d9e2f4a6
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1d9e2f4a6'
+down_revision: Union[str, Sequence[str], None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('collection_album_tracks',
+    sa.Column('collection_album_id', sa.String(), nullable=False),
+    sa.Column('track_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['collection_album_id'], ['collection_albums.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['track_id'], ['tracks.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('collection_album_id', 'track_id')
+    )
+    op.create_index(op.f('ix_collection_album_tracks_track_id'), 'collection_album_tracks', ['track_id'], unique=False)
+
+    # Move enabled track membership out of the JSON column
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, enabled_track_ids FROM collection_albums")).fetchall()
+    mappings = []
+    for collection_album_id, enabled_track_ids in rows:
+        if isinstance(enabled_track_ids, str):
+            enabled_track_ids = json.loads(enabled_track_ids)
+        for track_id in dict.fromkeys(enabled_track_ids or []):
+            mappings.append({'collection_album_id': collection_album_id, 'track_id': track_id})
+    if mappings:
+        op.bulk_insert(
+            sa.table('collection_album_tracks', sa.column('collection_album_id'), sa.column('track_id')),
+            mappings
+        )
+
+    with op.batch_alter_table('collection_albums') as batch_op:
+        batch_op.drop_column('enabled_track_ids')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('collection_albums') as batch_op:
+        batch_op.add_column(sa.Column('enabled_track_ids', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT collection_album_id, track_id FROM collection_album_tracks")).fetchall()
+    enabled = {}
+    for collection_album_id, track_id in rows:
+        enabled.setdefault(collection_album_id, []).append(track_id)
+    for collection_album_id, track_ids in enabled.items():
+        bind.execute(
+            sa.text("UPDATE collection_albums SET enabled_track_ids = :ids WHERE id = :id"),
+            {'ids': json.dumps(track_ids), 'id': collection_album_id}
+        )
+
+    op.drop_index(op.f('ix_collection_album_tracks_track_id'), table_name='collection_album_tracks')
+    op.drop_table('collection_album_tracks')
@@ -0,0 +1,36 @@
+"""add_queue_composite_index
+
+Revision ID: c3e5a7b9d1f2
+Revises: b7c1d9e2f4a6
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d1f2'
+down_revision: Union[str, Sequence[str], None] = 'b7c1d9e2f4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_queue_cid_status_pos', 'queue', ['collection_id', 'status', 'position'], unique=False)
+    # Partial index for PostgreSQL only (matches the model's ddl_if)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_queue_active', 'queue', ['collection_id', 'position'], unique=False,
+            postgresql_where=sa.text("status IN ('PENDING', 'PLAYING')")
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_queue_active', table_name='queue')
+    op.drop_index('ix_queue_cid_status_pos', table_name='queue')
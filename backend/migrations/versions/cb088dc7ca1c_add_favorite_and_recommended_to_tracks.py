@@ -20,11 +20,14 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    op.add_column('tracks', sa.Column('is_favorite', sa.Boolean(), nullable=False, server_default='0'))
-    op.add_column('tracks', sa.Column('is_recommended', sa.Boolean(), nullable=False, server_default='0'))
+    with op.batch_alter_table('tracks') as batch_op:
+        batch_op.add_column(sa.Column('is_favorite', sa.Boolean(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('is_recommended', sa.Boolean(), nullable=False, server_default='0'))
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    op.drop_column('tracks', 'is_recommended')
-    op.drop_column('tracks', 'is_favorite')
+    # One batch so SQLite rebuilds the table once for both columns
+    with op.batch_alter_table('tracks') as batch_op:
+        batch_op.drop_column('is_recommended')
+        batch_op.drop_column('is_favorite')
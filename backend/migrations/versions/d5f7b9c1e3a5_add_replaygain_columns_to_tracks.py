@@ -0,0 +1,52 @@
+"""add_replaygain_columns_to_tracks
+
+Revision ID: d5f7b9c1e3a5
+Revises: c3e5a7b9d1f2
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f7b9c1e3a5'
+down_revision: Union[str, Sequence[str], None] = 'c3e5a7b9d1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tracks', sa.Column('replaygain_track_db', sa.Float(), nullable=True))
+    op.add_column('tracks', sa.Column('replaygain_album_db', sa.Float(), nullable=True))
+
+    # Backfill from the JSON extra_metadata written by the library scan
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, extra_metadata FROM tracks WHERE extra_metadata IS NOT NULL")).fetchall()
+    for track_id, extra in rows:
+        if isinstance(extra, str):
+            extra = json.loads(extra)
+        extra = extra or {}
+        track_gain = extra.get('replaygain_track_gain')
+        album_gain = extra.get('replaygain_album_gain')
+        if track_gain is None and album_gain is None:
+            continue
+        bind.execute(
+            sa.text("UPDATE tracks SET replaygain_track_db = :track_db, replaygain_album_db = :album_db WHERE id = :id"),
+            {
+                'track_db': float(track_gain) if track_gain is not None else None,
+                'album_db': float(album_gain) if album_gain is not None else None,
+                'id': track_id,
+            }
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tracks') as batch_op:
+        batch_op.drop_column('replaygain_album_db')
+        batch_op.drop_column('replaygain_track_db')
@@ -20,14 +20,17 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # Add archived column to albums table (with default False)
-    op.add_column('albums', sa.Column('archived', sa.Boolean(), nullable=False, server_default='0'))
-    
-    # Add custom_cover_art_path column to albums table
-    op.add_column('albums', sa.Column('custom_cover_art_path', sa.String(), nullable=True))
+    with op.batch_alter_table('albums') as batch_op:
+        # Add archived column to albums table (with default False)
+        batch_op.add_column(sa.Column('archived', sa.Boolean(), nullable=False, server_default='0'))
+        
+        # Add custom_cover_art_path column to albums table
+        batch_op.add_column(sa.Column('custom_cover_art_path', sa.String(), nullable=True))
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    op.drop_column('albums', 'custom_cover_art_path')
-    op.drop_column('albums', 'archived')
+    # One batch so SQLite rebuilds the table once for both columns
+    with op.batch_alter_table('albums') as batch_op:
+        batch_op.drop_column('custom_cover_art_path')
+        batch_op.drop_column('archived')
@@ -0,0 +1,34 @@
+"""add_track_search_indexes
+
+Revision ID: e9a1c3e5f7b9
+Revises: d5f7b9c1e3a5
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a1c3e5f7b9'
+down_revision: Union[str, Sequence[str], None] = 'd5f7b9c1e3a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_tracks_title_trgm ON tracks USING gin (title gin_trgm_ops)")
+        op.execute("CREATE INDEX ix_tracks_artist_trgm ON tracks USING gin (artist gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tracks_artist_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_tracks_title_trgm")
@@ -0,0 +1,39 @@
+"""add_queue_active_track_unique_index
+
+Revision ID: f2b4d6f8a0c2
+Revises: e9a1c3e5f7b9
+Create Date: 2026-10-15 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b4d6f8a0c2'
+down_revision: Union[str, Sequence[str], None] = 'e9a1c3e5f7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the earliest pending/playing entry per track before enforcing uniqueness
+    op.execute(
+        "DELETE FROM queue WHERE status IN ('PENDING', 'PLAYING') AND EXISTS ("
+        "SELECT 1 FROM queue q2 WHERE q2.collection_id = queue.collection_id "
+        "AND q2.track_id = queue.track_id AND q2.status IN ('PENDING', 'PLAYING') "
+        "AND (q2.position < queue.position OR (q2.position = queue.position AND q2.id < queue.id)))"
+    )
+    op.create_index(
+        'ux_queue_active_track', 'queue', ['collection_id', 'track_id'], unique=True,
+        postgresql_where=sa.text("status IN ('PENDING', 'PLAYING')"),
+        sqlite_where=sa.text("status IN ('PENDING', 'PLAYING')")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_queue_active_track', table_name='queue')
@@ -1,7 +1,7 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { useState, useEffect, useRef } from 'react';
 import { MdPlayArrow, MdStop, MdVisibility, MdVisibilityOff, MdArchive, MdUnarchive, MdStar, MdStarBorder, MdCircle } from 'react-icons/md';
-import { adminApi, collectionsApi } from '../../services/api';
+import { adminApi } from '../../services/api';
 import { audioService } from '../../services/audio';
 import styles from './AlbumEditModal.module.css'
 import clsx from 'clsx';
@@ -36,9 +36,9 @@ export default function AlbumEditModal({ albumId, onClose }: Props) {
   });
 
   const { data: collections } = useQuery({
-    queryKey: ['collections'],
+    queryKey: ['collections', 'summary'],
     queryFn: async () => {
-      const response = await collectionsApi.getAll();
+      const response = await adminApi.listCollectionsSummary();
       return response.data;
     },
   });
@@ -2,6 +2,7 @@
 import axios from 'axios';
 import type {
   Collection,
+  CollectionSummary,
   Album,
   AlbumDetail,
   QueueItem,
@@ -104,6 +105,7 @@ export const adminApi = {
   updateTrack: (id: string, data: { title?: string; enabled?: boolean; archived?: boolean; is_favorite?: boolean; is_recommended?: boolean }) =>
     api.put(`/admin/tracks/${id}`, data),
   // Collection management
+  listCollectionsSummary: () => api.get<CollectionSummary[]>('/admin/collections'),
   createCollection: (name: string, slug: string, description?: string) =>
     api.post('/admin/collections', { name, slug, description }),
   updateCollection: (
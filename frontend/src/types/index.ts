@@ -32,6 +32,14 @@ export interface Collection {
   default_hit_button_mode?: HitButtonMode | null;
 }
 
+/** Lightweight collection listing (GET /admin/collections) */
+export interface CollectionSummary {
+  id: string;
+  name: string;
+  slug: string;
+  is_active: boolean;
+}
+
 export interface Album {
   id: string;
   display_number?: number;
@@ -0,0 +1,8 @@
+"""
+Helpers shared by the scripts that maintain albums_to_download.json.
+"""
+
+
+def sort_key(entry: dict) -> tuple:
+    """File order: first artist, then album name (case-insensitive)."""
+    return (entry["artists"][0]["name"].lower() if entry.get("artists") else "", entry["name"].lower())
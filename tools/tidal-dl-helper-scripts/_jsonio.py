@@ -0,0 +1,50 @@
+"""
+JSON file helpers shared by the album list scripts.
+
+Uses orjson (parses bytes directly, much faster dumps) when installed and falls back
+to the stdlib json module otherwise; both produce the same file contents.
+"""
+import json
+import os
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib json module
+    orjson = None
+
+
+def load_json(path: Path):
+    """Parse a JSON file."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def dump_json(obj) -> bytes:
+    """Serialize obj as 2-space indented UTF-8 JSON with a trailing newline."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def write_json(path: Path, obj) -> bool:
+    """
+    Write obj to path as dump_json does. Written to a temp file and renamed over the
+    original, so an interrupted run never leaves a truncated file behind.
+
+    Returns False (and leaves the file untouched) when its contents would not change.
+    """
+    data = dump_json(obj)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+    return True
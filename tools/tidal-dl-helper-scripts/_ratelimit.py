@@ -0,0 +1,27 @@
+"""
+Request rate limiting shared by the scripts that search Spotify/Tidal from a thread pool.
+"""
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """Sliding-window limiter: at most `rate` acquisitions per second across threads."""
+
+    def __init__(self, rate: int) -> None:
+        self._rate = rate
+        self._starts: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= 1.0:
+                    self._starts.popleft()
+                if len(self._starts) < self._rate:
+                    self._starts.append(now)
+                    return
+                wait = 1.0 - (now - self._starts[0])
+            time.sleep(wait)
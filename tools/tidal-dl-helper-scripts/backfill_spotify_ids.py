@@ -7,25 +7,35 @@ saved list). Only updates entries in place; does not add or remove any rows.
 Match is by album name + artist(s): we only set id/url when we find a result
 that matches both, to avoid wrong albums (e.g. same title, different artist).
 """
-import json
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
+from spotipy.exceptions import SpotifyException
+
+from _jsonio import load_json, write_json
+from _ratelimit import RateLimiter
 from spotify_auth import get_spotify_client
 
 _PROJECT_DIR = Path(__file__).resolve().parent
 ALBUMS_FILE = _PROJECT_DIR / "albums_to_download.json"
-SEARCH_DELAY = 0.4  # seconds between searches to avoid rate limits
+SEARCH_WORKERS = 4  # concurrent searches in flight
+SEARCH_RATE = 3  # max searches started per second (Spotify allows ~180/min)
+SEARCH_RETRIES = 3  # retries on HTTP 429 (waits Retry-After)
+_WS_RE = re.compile(r"\s+")
 
 
+@lru_cache(maxsize=8192)
 def _normalize(s: str) -> str:
     if not s:
         return ""
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+    return _WS_RE.sub(" ", (s or "").strip().lower())
 
 
+@lru_cache(maxsize=4096)
 def _sanitize_for_search(s: str) -> str:
     """Remove characters that break Spotify search (quotes, apostrophes)."""
     if not s:
@@ -61,17 +71,24 @@ def _get_spotify_artist_names(album_item: dict) -> set:
     return names
 
 
-def _score_match(entry: dict, album_item: dict) -> tuple[int, bool]:
-    """
-    Score how well a Spotify search result matches our entry.
-    Returns (score, acceptable). acceptable = True only if both album and artist match.
-    """
+def _wanted_names(entry: dict) -> tuple[str, set]:
+    """Normalized album name and artist names for an entry (computed once per search)."""
     want_album = _normalize(entry.get("name") or "")
     want_artists = {
         _normalize(a.get("name") or "")
         for a in (entry.get("artists") or [])
         if a.get("name")
     }
+    return want_album, want_artists
+
+
+def _score_match(wanted: tuple[str, set], album_item: dict) -> tuple[int, bool]:
+    """
+    Score how well a Spotify search result matches our entry.
+    wanted is _wanted_names(entry).
+    Returns (score, acceptable). acceptable = True only if both album and artist match.
+    """
+    want_album, want_artists = wanted
     got_album = _normalize(album_item.get("name") or "")
     got_artists = _get_spotify_artist_names(album_item)
 
@@ -88,6 +105,7 @@ def _score_match(entry: dict, album_item: dict) -> tuple[int, bool]:
         album_score = 0
         album_ok = False
 
+    # Exact name overlap first; the pairwise substring check only runs when that fails
     artist_ok = bool(want_artists & got_artists) or any(
         wa in ga or ga in wa for wa in want_artists for ga in got_artists
     )
@@ -97,12 +115,27 @@ def _score_match(entry: dict, album_item: dict) -> tuple[int, bool]:
     return score, acceptable
 
 
+def _search_albums(sp, limiter: RateLimiter, query: str) -> list:
+    """Run one rate-limited album search, retrying on HTTP 429 after Retry-After."""
+    for attempt in range(SEARCH_RETRIES + 1):
+        limiter.acquire()
+        try:
+            result = sp.search(q=query, type="album", limit=10)
+            return (result.get("albums") or {}).get("items") or []
+        except SpotifyException as e:
+            if e.http_status != 429 or attempt == SEARCH_RETRIES:
+                raise
+            retry_after = (e.headers or {}).get("Retry-After")
+            time.sleep(float(retry_after) if retry_after else 1.0 + attempt)
+    return []
+
+
 def main() -> None:
     if not ALBUMS_FILE.exists():
         print(f"Missing {ALBUMS_FILE}", file=sys.stderr)
         return
 
-    albums = json.loads(ALBUMS_FILE.read_text(encoding="utf-8"))
+    albums = load_json(ALBUMS_FILE)
     if not isinstance(albums, list):
         print("Invalid albums file.", file=sys.stderr)
         return
@@ -116,35 +149,43 @@ def main() -> None:
     sp = get_spotify_client()
 
     updated = 0
-    for idx, i in enumerate(to_update):
-        entry = albums[i]
-        query = _build_search_query(entry)
-        if not query:
-            print(f"  [{idx+1}/{len(to_update)}] Skipped (no name/artist): {entry.get('name', '')!r}")
-            continue
-        try:
-            result = sp.search(q=query, type="album", limit=10)
-            items = (result.get("albums") or {}).get("items") or []
-            chosen = None
-            best_score = -1
-            for item in items:
-                score, acceptable = _score_match(entry, item)
-                if acceptable and score > best_score:
-                    best_score = score
-                    chosen = item
-            if chosen and chosen.get("id"):
-                entry["spotify_id"] = chosen["id"]
-                entry["spotify_url"] = f"https://open.spotify.com/album/{chosen['id']}"
-                updated += 1
-                print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> {chosen['id']}")
-            else:
-                reason = "no results" if not items else "no matching album+artist"
-                print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> {reason}")
-        except Exception as e:
-            print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> error: {e}")
-        time.sleep(SEARCH_DELAY)
-
-    ALBUMS_FILE.write_text(json.dumps(albums, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    limiter = RateLimiter(SEARCH_RATE)
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        futures = {}
+        for idx, i in enumerate(to_update):
+            entry = albums[i]
+            query = _build_search_query(entry)
+            if not query:
+                print(f"  [{idx+1}/{len(to_update)}] Skipped (no name/artist): {entry.get('name', '')!r}")
+                continue
+            futures[executor.submit(_search_albums, sp, limiter, query)] = (idx, i, query)
+
+        # Matching and in-place updates happen here on the main thread
+        for future in as_completed(futures):
+            idx, i, query = futures[future]
+            entry = albums[i]
+            try:
+                items = future.result()
+                chosen = None
+                best_score = -1
+                wanted = _wanted_names(entry)
+                for item in items:
+                    score, acceptable = _score_match(wanted, item)
+                    if acceptable and score > best_score:
+                        best_score = score
+                        chosen = item
+                if chosen and chosen.get("id"):
+                    entry["spotify_id"] = chosen["id"]
+                    entry["spotify_url"] = f"https://open.spotify.com/album/{chosen['id']}"
+                    updated += 1
+                    print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> {chosen['id']}")
+                else:
+                    reason = "no results" if not items else "no matching album+artist"
+                    print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> {reason}")
+            except Exception as e:
+                print(f"  [{idx+1}/{len(to_update)}] {query[:60]!r} -> error: {e}")
+
+    write_json(ALBUMS_FILE, albums)
     print(f"\nUpdated {updated}/{len(to_update)} entries with spotify_id/spotify_url. Saved {ALBUMS_FILE.name}")
 
 
@@ -19,12 +19,13 @@ Usage:
     → Only include the first 20 eligible albums in the URL list (and run, if --run).
 """
 import argparse
-import json
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+from _jsonio import load_json, write_json
+
 _PROJECT_DIR = Path(__file__).resolve().parent
 ALBUMS_FILE = _PROJECT_DIR / "albums_to_download.json"
 URLS_FILE = _PROJECT_DIR / "tidal_dl_urls.txt"
@@ -52,7 +53,7 @@ def main() -> None:
         print(f"Missing {ALBUMS_FILE}. Run resolve_tidal.py first.")
         sys.exit(1)
 
-    albums = json.loads(ALBUMS_FILE.read_text(encoding="utf-8"))
+    albums = load_json(ALBUMS_FILE)
     urls = []
     indices_in_run = []  # album indices included in this URL list
     for i, entry in enumerate(albums):
@@ -95,10 +96,7 @@ def main() -> None:
         if rc == 0 and indices_in_run:
             for i in indices_in_run:
                 albums[i]["downloaded"] = True
-            ALBUMS_FILE.write_text(
-                json.dumps(albums, indent=2, ensure_ascii=False) + "\n",
-                encoding="utf-8",
-            )
+            write_json(ALBUMS_FILE, albums)
             print(f"Marked {len(indices_in_run)} album(s) as downloaded in {ALBUMS_FILE.name}")
         sys.exit(rc)
 
@@ -19,16 +19,15 @@ Requires playlist-read-private scope for your playlists; public playlists may wo
 import argparse
 import re
 import sys
-import urllib.request
 from pathlib import Path
-
-from spotify_auth import get_spotify_client
+from urllib.parse import urlparse
 
 SCOPE_PLAYLIST = "playlist-read-private playlist-read-collaborative"
 
 
 # Spotify playlist link: .../playlist/<22-char base62 id> (optional ?query after)
-SPOTIFY_PLAYLIST_LINK_RE = re.compile(r"open\.spotify\.com/playlist/([a-zA-Z0-9]{22})(?:\?|$|/)")
+SPOTIFY_PLAYLIST_LINK_RE = re.compile(r"open\.spotify\.com/playlist/([a-zA-Z0-9]{22})(?:\?|$|/)", re.ASCII)
+_PLAYLIST_PATH_PREFIX = "/playlist/"
 
 
 def extract_playlist_id_from_link(link: str) -> str | None:
@@ -36,6 +35,13 @@ def extract_playlist_id_from_link(link: str) -> str | None:
     link = (link or "").strip().replace("\\", "")  # normalize escaped pastes e.g. \?si\=
     if not link:
         return None
+    # Common case: a full https link, parsed structurally
+    parsed = urlparse(link)
+    if parsed.netloc == "open.spotify.com" and parsed.path.startswith(_PLAYLIST_PATH_PREFIX):
+        playlist_id = parsed.path[len(_PLAYLIST_PATH_PREFIX):].split("/")[0]
+        if len(playlist_id) == 22 and playlist_id.isascii() and playlist_id.isalnum():
+            return playlist_id
+    # Anything else (no scheme, odd pastes): look for the link pattern
     m = SPOTIFY_PLAYLIST_LINK_RE.search(link)
     if m:
         return m.group(1)
@@ -56,15 +62,27 @@ def pick_image(images: list[dict], size_arg: str) -> dict | None:
         want_w = int(size_arg)
     except ValueError:
         return max(images, key=lambda i: i.get("width") or 0)
-    # Closest available width (some images have null width for custom uploads)
-    best = images[0]
-    best_diff = float("inf")
-    for img in images:
-        w = img.get("width")
-        if w is not None and (abs(w - want_w) < best_diff):
-            best_diff = abs(w - want_w)
-            best = img
-    return best
+    # Closest available width; null widths (custom uploads) sort last, and min keeps the
+    # first image on ties, so all-null lists still return images[0]
+    return min(
+        images,
+        key=lambda i: abs(i["width"] - want_w) if i.get("width") is not None else float("inf"),
+    )
+
+
+def _download_session():
+    """Keep-alive session for image downloads; 429/5xx are retried with backoff by the adapter."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    ))
+    return session
 
 
 def main() -> None:
@@ -94,6 +112,10 @@ def main() -> None:
         print("  https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M", file=sys.stderr)
         sys.exit(1)
 
+    # spotipy/requests are imported only after the link validates, so --help and bad
+    # links answer immediately
+    from spotify_auth import get_spotify_client
+
     sp = get_spotify_client(scope=SCOPE_PLAYLIST)
     try:
         playlist = sp.playlist(playlist_id)
@@ -119,7 +141,12 @@ def main() -> None:
         out_path = Path(out_path)
 
     try:
-        urllib.request.urlretrieve(url, out_path)
+        with _download_session().get(url, stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            with open(out_path, "wb") as f:
+                # iter_content decodes any gzip/deflate Content-Encoding; resp.raw would not
+                for chunk in resp.iter_content(1 << 20):
+                    f.write(chunk)
     except Exception as e:
         print(f"Failed to download image: {e}", file=sys.stderr)
         sys.exit(1)
@@ -6,14 +6,17 @@ New albums are appended (no duplicates by spotify_id). Existing entries keep the
 downloaded, tidal_url, no_match fields. Uses same auth as spotify_auth (SPOTIPY_*
 env / .env, .spotify_cache). On first run you'll be prompted to log in in the browser.
 """
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from _albumlist import sort_key
+from _jsonio import load_json, write_json
 from spotify_auth import get_spotify_client
 
 OUTPUT_FILE = Path(__file__).resolve().parent / "albums_to_download.json"
 PAGE_SIZE = 50
+PAGE_WORKERS = 6  # concurrent page requests
 
 
 def _album_key(entry: dict) -> tuple:
@@ -42,20 +45,26 @@ def _normalize_key(entry: dict) -> tuple:
 def main() -> None:
     existing: list[dict] = []
     if OUTPUT_FILE.exists():
-        existing = json.loads(OUTPUT_FILE.read_text(encoding="utf-8"))
+        existing = load_json(OUTPUT_FILE)
         if not isinstance(existing, list):
             existing = []
-    seen_keys = {_album_key(a) for a in existing}
 
     sp = get_spotify_client()
+    # The first page gives the total; the remaining pages are fetched concurrently
+    # (spotipy's session retries HTTP 429 after Retry-After)
+    first_page = sp.current_user_saved_albums(limit=PAGE_SIZE, offset=0)
+    pages = [first_page]
+    offsets = range(PAGE_SIZE, first_page.get("total") or 0, PAGE_SIZE)
+    if offsets:
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as executor:
+            pages.extend(executor.map(
+                lambda offset: sp.current_user_saved_albums(limit=PAGE_SIZE, offset=offset),
+                offsets,
+            ))
+
     spotify_entries: list[dict] = []
-    offset = 0
-    while True:
-        page = sp.current_user_saved_albums(limit=PAGE_SIZE, offset=offset)
-        items = page.get("items", [])
-        if not items:
-            break
-        for item in items:
+    for page in pages:
+        for item in page.get("items", []):
             album = item.get("album", {})
             album_id = album.get("id", "")
             artists = [{"name": a.get("name", "")} for a in album.get("artists", [])]
@@ -65,9 +74,6 @@ def main() -> None:
                 "spotify_id": album_id,
                 "spotify_url": f"https://open.spotify.com/album/{album_id}" if album_id else "",
             })
-        offset += len(items)
-        if not page.get("next"):
-            break
 
     # Lookup: normalized (name, artists) -> spotify entry (for backfilling)
     by_name_artists = {_normalize_key(e): e for e in spotify_entries}
@@ -84,7 +90,7 @@ def main() -> None:
             entry["spotify_url"] = s.get("spotify_url", "")
             backfilled += 1
 
-    # Recompute seen_keys so backfilled entries (now with spotify_id) count as seen — avoids adding duplicates
+    # Built after backfill so backfilled entries (now with spotify_id) count as seen — avoids adding duplicates
     seen_keys = {_album_key(a) for a in existing}
 
     # Add new albums from Spotify that aren't already in the list
@@ -96,8 +102,8 @@ def main() -> None:
             added.append(entry)
 
     albums = existing + added
-    albums.sort(key=lambda a: (a["artists"][0]["name"].lower() if a.get("artists") else "", a["name"].lower()))
-    OUTPUT_FILE.write_text(json.dumps(albums, indent=2), encoding="utf-8")
+    albums.sort(key=sort_key)
+    write_json(OUTPUT_FILE, albums)
     print(
         f"Wrote {len(albums)} albums to {OUTPUT_FILE.name}: {backfilled} backfilled with Spotify id/url, {len(added)} new.",
         file=sys.stderr,
@@ -7,12 +7,14 @@ you'll be prompted to log in. New albums are appended (no duplicates by tidal_ur
 Existing entries get tidal_url backfilled when name+artists match. Other fields
 (spotify_id, downloaded, etc.) are preserved.
 """
-import json
 import sys
 from pathlib import Path
 
 from tidalapi import Session
 
+from _albumlist import sort_key
+from _jsonio import load_json, write_json
+
 _PROJECT_DIR = Path(__file__).resolve().parent
 ALBUMS_FILE = _PROJECT_DIR / "albums_to_download.json"
 SESSION_FILE = _PROJECT_DIR / ".tidal_session.json"
@@ -42,10 +44,9 @@ def _normalize_key(entry: dict) -> tuple:
 def main() -> None:
     existing: list[dict] = []
     if ALBUMS_FILE.exists():
-        existing = json.loads(ALBUMS_FILE.read_text(encoding="utf-8"))
+        existing = load_json(ALBUMS_FILE)
         if not isinstance(existing, list):
             existing = []
-    seen_keys = {_album_key(a) for a in existing}
 
     session = Session()
     if not session.login_session_file(SESSION_FILE):
@@ -91,6 +92,7 @@ def main() -> None:
             entry["tidal_url"] = t.get("tidal_url", "")
             backfilled += 1
 
+    # Built after backfill so backfilled entries (now with tidal_url) count as seen
     seen_keys = {_album_key(a) for a in existing}
 
     # Add new albums from Tidal that aren't already in the list
@@ -102,16 +104,8 @@ def main() -> None:
             added.append(entry)
 
     albums = existing + added
-    albums.sort(
-        key=lambda a: (
-            a["artists"][0]["name"].lower() if a.get("artists") else "",
-            a["name"].lower(),
-        )
-    )
-    ALBUMS_FILE.write_text(
-        json.dumps(albums, indent=2, ensure_ascii=False) + "\n",
-        encoding="utf-8",
-    )
+    albums.sort(key=sort_key)
+    write_json(ALBUMS_FILE, albums)
     print(
         f"Wrote {len(albums)} albums to {ALBUMS_FILE.name}: {backfilled} backfilled with tidal_url, {len(added)} new.",
         file=sys.stderr,
@@ -12,10 +12,12 @@ into a single albums_to_download.json.
 - Result is sorted alphabetically by artist then album name and written to
   albums_to_download.json.
 """
-import json
 import sys
 from pathlib import Path
 
+from _albumlist import sort_key
+from _jsonio import load_json, write_json
+
 _PROJECT_DIR = Path(__file__).resolve().parent
 ALBUMS_FILE = _PROJECT_DIR / "albums_to_download.json"
 SPOTIFY_FILE = _PROJECT_DIR / "spotify_saved_albums.json"
@@ -39,21 +41,24 @@ def main() -> None:
         print(f"Missing {SPOTIFY_FILE}", file=sys.stderr)
         sys.exit(1)
 
-    albums = json.loads(ALBUMS_FILE.read_text(encoding="utf-8"))
+    albums = load_json(ALBUMS_FILE)
     if not isinstance(albums, list):
         albums = []
 
-    spotify_list = json.loads(SPOTIFY_FILE.read_text(encoding="utf-8"))
+    spotify_list = load_json(SPOTIFY_FILE)
     if not isinstance(spotify_list, list):
         spotify_list = []
 
-    # Lookup: normalized (name, artists) -> spotify entry (for id/url)
-    by_name_artists = {_normalize_key(s): s for s in spotify_list}
+    # Lookup: normalized (name, artists) -> spotify entry (for id/url); keys computed once
+    spotify_keyed = [(_normalize_key(s), s) for s in spotify_list]
+    by_name_artists = dict(spotify_keyed)
 
     # Add spotify_id and spotify_url to existing albums_to_download entries when matched
     updated = 0
+    existing_keys = set()
     for entry in albums:
         k = _normalize_key(entry)
+        existing_keys.add(k)
         if k in by_name_artists:
             s = by_name_artists[k]
             if s.get("spotify_id") or s.get("spotify_url"):
@@ -63,14 +68,13 @@ def main() -> None:
 
     # Don't add spotify entries that are already in albums_to_download
     existing_spotify_ids = {a.get("spotify_id") for a in albums if a.get("spotify_id")}
-    existing_keys = {_normalize_key(a) for a in albums}
 
     added = 0
-    for s in spotify_list:
+    for k, s in spotify_keyed:
         sid = s.get("spotify_id")
         if sid and sid in existing_spotify_ids:
             continue
-        if _normalize_key(s) in existing_keys:
+        if k in existing_keys:
             continue
         albums.append({
             "name": s.get("name", ""),
@@ -81,10 +85,10 @@ def main() -> None:
         added += 1
         if sid:
             existing_spotify_ids.add(sid)
-        existing_keys.add(_normalize_key(s))
+        existing_keys.add(k)
 
-    albums.sort(key=lambda a: (a["artists"][0]["name"].lower() if a.get("artists") else "", a["name"].lower()))
-    ALBUMS_FILE.write_text(json.dumps(albums, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    albums.sort(key=sort_key)
+    write_json(ALBUMS_FILE, albums)
     print(f"Wrote {len(albums)} albums to {ALBUMS_FILE.name}: {updated} existing updated with Spotify id/url, {added} new from Spotify.", file=sys.stderr)
 
 
@@ -9,40 +9,70 @@ the best-matching result (album name + artist must match) to avoid wrong albums.
 Skips entries that already have a tidal_url (resolved) or have downloaded=true. Use --force to re-resolve.
 """
 import argparse
-import json
 import re
-import time
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from tidalapi import Album, Session
+from _jsonio import load_json, write_json
+from _ratelimit import RateLimiter
+
+if TYPE_CHECKING:
+    from tidalapi import Session
 
 _PROJECT_DIR = Path(__file__).resolve().parent
 ALBUMS_FILE = _PROJECT_DIR / "albums_to_download.json"
 SESSION_FILE = _PROJECT_DIR / ".tidal_session.json"
-# Rate limit: delay between Tidal API search requests (seconds)
-SEARCH_DELAY = 0.5
+# query -> search results from earlier runs (only what _score_match needs)
+SEARCH_CACHE_FILE = _PROJECT_DIR / ".tidal_search_cache.json"
+SEARCH_WORKERS = 8  # concurrent searches in flight
+SEARCH_RATE = 4  # max searches started per second, shared by all workers
+_WS_RE = re.compile(r"\s+")
+_AMP_RE = re.compile(r"\s*&\s*")
+_PLUS_RE = re.compile(r"\s+\+\s+")
+_PAREN_RE = re.compile(r"\s*\([^)]*\)\s*")
+_BRACK_RE = re.compile(r"\s*\[[^\]]*\]\s*")
+_SEARCH_TRANS = str.maketrans({
+    # Colons and slashes -> space so they don't split the query
+    ":": " ", "/": " ",
+    # Strip quotes and apostrophes (straight and curly)
+    '"': " ", "'": "", "\u2018": "", "\u2019": "",
+    # Optional: strip ! and ? so "Yes Lawd!" doesn't confuse
+    "!": " ", "?": " ",
+})
 
 
 def _normalize(s: str) -> str:
     """Lowercase, strip, collapse spaces."""
     if not s:
         return ""
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+    return _WS_RE.sub(" ", (s or "").strip().lower())
+
+
+def _strip_accents(s: str) -> str:
+    """Drop combining marks after NFD decomposition (é -> e). ASCII input has none."""
+    if s.isascii():
+        return s
+    s = unicodedata.normalize("NFD", s)
+    return "".join(c for c in s if unicodedata.category(c) != "Mn")
 
 
+@lru_cache(maxsize=8192)
 def _normalize_for_match(s: str) -> str:
     """Like _normalize but also &/+ -> 'and' and strip accents, for lenient scoring."""
     if not s:
         return ""
     s = (s or "").strip().lower()
-    s = re.sub(r"\s*&\s*", " and ", s)
-    s = re.sub(r"\s+\+\s+", " and ", s)
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
-    return re.sub(r"\s+", " ", s).strip()
+    s = _AMP_RE.sub(" and ", s)
+    s = _PLUS_RE.sub(" and ", s)
+    s = _strip_accents(s)
+    return _WS_RE.sub(" ", s).strip()
 
 
+@lru_cache(maxsize=8192)
 def _sanitize_for_search(s: str) -> str:
     """
     Make a string safe for Tidal search: remove parentheticals, normalize
@@ -53,22 +83,17 @@ def _sanitize_for_search(s: str) -> str:
         return ""
     s = (s or "").strip()
     # Remove parenthetical content e.g. "Album (Remaster)" or "Artist (2)"
-    s = re.sub(r"\s*\([^)]*\)\s*", " ", s)
+    s = _PAREN_RE.sub(" ", s)
     # Remove brackets and their content e.g. "Album [2024]"
-    s = re.sub(r"\s*\[[^\]]*\]\s*", " ", s)
+    s = _BRACK_RE.sub(" ", s)
     # Remove & from query (replace with space) so Tidal search finds "Echo The Bunnymen" etc.
-    s = re.sub(r"\s*&\s*", " ", s)
-    s = re.sub(r"\s+\+\s+", " and ", s)
-    # Colons and slashes -> space so they don't split the query
-    s = s.replace(":", " ").replace("/", " ")
-    # Strip quotes and apostrophes (straight and curly)
-    s = s.replace('"', " ").replace("'", "").replace("'", "").replace("'", "")
-    # Optional: strip ! and ? so "Yes Lawd!" doesn't confuse
-    s = s.replace("!", " ").replace("?", " ")
+    s = _AMP_RE.sub(" ", s)
+    s = _PLUS_RE.sub(" and ", s)
+    # Colons, slashes, quotes, apostrophes, ! and ? in one pass (see _SEARCH_TRANS)
+    s = s.translate(_SEARCH_TRANS)
     # Normalize accents for search: é -> e, ü -> u (Tidal often matches ASCII)
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in s if unicodedata.category(c) != "Mn")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _strip_accents(s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
@@ -85,29 +110,40 @@ def build_search_query(entry: dict) -> str:
     return " ".join(parts) if parts else ""
 
 
-def _score_match(entry: dict, tidal_album) -> tuple[int, bool]:
+# Highest score _score_match can return (exact album = 2, artist match = 1)
+_BEST_SCORE = 3
+
+
+def _wanted_names(entry: dict) -> tuple[str, frozenset]:
+    """Normalized album name and artist names for an entry (computed once per entry)."""
+    want_album = _normalize_for_match(entry.get("name") or "")
+    want_artists = frozenset(
+        _normalize_for_match(a.get("name") or "")
+        for a in (entry.get("artists") or [])
+        if a.get("name")
+    )
+    return want_album, want_artists
+
+
+def _score_match(wanted: tuple[str, frozenset], tidal_album) -> tuple[int, bool]:
     """
     Score how well a Tidal search result matches our wanted album/artists.
+    wanted is _wanted_names(entry).
     Returns (score, acceptable). acceptable = True only if both album and artist match.
     Uses lenient normalization (&/and, accents) so Tidal results still match.
     """
-    want_album = _normalize_for_match(entry.get("name") or "")
-    want_artists = {
-        _normalize_for_match(a.get("name") or "")
-        for a in (entry.get("artists") or [])
-        if a.get("name")
-    }
+    want_album, want_artists = wanted
     got_album = _normalize_for_match(getattr(tidal_album, "name", None) or "")
-    got_artists = set()
+    got_artists = []
     for a in (getattr(tidal_album, "artists", None) or []):
         n = _normalize_for_match(getattr(a, "name", None) or "")
         if n:
-            got_artists.add(n)
+            got_artists.append(n)
     artist = getattr(tidal_album, "artist", None)
     if artist and getattr(artist, "name", None):
         n = _normalize_for_match(artist.name)
         if n:
-            got_artists.add(n)
+            got_artists.append(n)
 
     # Album: exact match = 2, one contains the other = 1, else 0
     if want_album == got_album:
@@ -123,8 +159,9 @@ def _score_match(entry: dict, tidal_album) -> tuple[int, bool]:
         album_score = 0
         album_ok = False
 
-    # Artist: at least one wanted artist matches a Tidal artist (exact or substring)
-    artist_ok = bool(want_artists & got_artists) or any(
+    # Artist: at least one wanted artist matches a Tidal artist (exact or substring).
+    # Exact name overlap first; the pairwise substring check only runs when that fails
+    artist_ok = not want_artists.isdisjoint(got_artists) or any(
         wa in ga or ga in wa for wa in want_artists for ga in got_artists
     )
     artist_score = 1 if artist_ok else 0
@@ -135,6 +172,74 @@ def _score_match(entry: dict, tidal_album) -> tuple[int, bool]:
     return score, acceptable
 
 
+def _best_candidate(wanted: tuple[str, frozenset], album_list: list):
+    """Highest-scoring acceptable search result for wanted (see _score_match), or None."""
+    chosen = None
+    best_score = -1
+    for candidate in album_list:
+        score, acceptable = _score_match(wanted, candidate)
+        if acceptable and score > best_score:
+            best_score = score
+            chosen = candidate
+            if best_score >= _BEST_SCORE:
+                break  # exact album + artist: later candidates can't score higher
+    return chosen
+
+
+@dataclass
+class _CachedArtist:
+    name: str
+
+
+@dataclass
+class _CachedAlbum:
+    """Search result rebuilt from the cache; has the attributes _score_match and main read."""
+    name: str
+    id: object
+    share_url: str | None
+    artists: list[_CachedArtist] = field(default_factory=list)
+    artist: _CachedArtist | None = None
+
+
+def _album_to_cache(album) -> dict:
+    artist = getattr(album, "artist", None)
+    return {
+        "name": getattr(album, "name", None),
+        "id": getattr(album, "id", None),
+        "share_url": getattr(album, "share_url", None),
+        "artists": [getattr(a, "name", None) for a in (getattr(album, "artists", None) or [])],
+        "artist": getattr(artist, "name", None) if artist else None,
+    }
+
+
+def _album_from_cache(data: dict) -> _CachedAlbum:
+    return _CachedAlbum(
+        name=data.get("name"),
+        id=data.get("id"),
+        share_url=data.get("share_url"),
+        artists=[_CachedArtist(n) for n in data.get("artists") or []],
+        artist=_CachedArtist(data["artist"]) if data.get("artist") else None,
+    )
+
+
+def _load_search_cache() -> dict[str, list[dict]]:
+    if not SEARCH_CACHE_FILE.exists():
+        return {}
+    try:
+        cache = load_json(SEARCH_CACHE_FILE)
+    except ValueError:
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _search_albums(session: "Session", limiter: RateLimiter, query: str) -> list:
+    """Run one rate-limited Tidal album search."""
+    from tidalapi import Album
+    limiter.acquire()
+    result = session.search(query=query, models=[Album], limit=10)
+    return result.get("albums") or []
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Resolve album list to Tidal URLs.")
     parser.add_argument(
@@ -142,23 +247,33 @@ def main() -> None:
         action="store_true",
         help="Re-resolve all entries (ignore existing tidal_url). Use to fix wrong matches.",
     )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help=f"Ignore cached search results in {SEARCH_CACHE_FILE.name} and query Tidal again.",
+    )
     args = parser.parse_args()
 
     if not ALBUMS_FILE.exists():
         print(f"Missing {ALBUMS_FILE}. Copy albums_to_download.json.example and edit it.")
         return
 
-    albums: list[dict] = json.loads(ALBUMS_FILE.read_text(encoding="utf-8"))
+    albums: list[dict] = load_json(ALBUMS_FILE)
     if not albums:
         print("No albums in file.")
         return
 
+    # tidalapi (and requests under it) is imported only once there is work to do,
+    # so --help and a missing albums file answer immediately
+    from tidalapi import Session
+
     session = Session()
     if not session.login_session_file(SESSION_FILE):
         print("Tidal login failed.")
         return
 
     matched = 0
+    to_search = []  # (index, entry, query) still needing a Tidal search
     for i, entry in enumerate(albums):
         query = build_search_query(entry)
         if not query:
@@ -173,42 +288,80 @@ def main() -> None:
         if not args.force and entry.get("tidal_url") and not entry.get("no_match"):
             matched += 1
             continue
-        try:
-            result = session.search(query=query, models=[Album], limit=10)
-            album_list = result.get("albums") or []
-            chosen = None
-            best_score = -1
-            for candidate in album_list:
-                score, acceptable = _score_match(entry, candidate)
-                if acceptable and score > best_score:
-                    best_score = score
-                    chosen = candidate
-            if chosen:
-                url = getattr(chosen, "share_url", None) or (
-                    f"https://tidal.com/browse/album/{chosen.id}" if chosen.id else None
-                )
-                if url:
-                    entry["tidal_url"] = url
-                    entry["no_match"] = False
+        to_search.append((i, entry, query))
+
+    def apply_result(i: int, entry: dict, query: str, album_list: list) -> bool:
+        """Pick the best acceptable candidate and update entry; returns True if matched."""
+        chosen = _best_candidate(_wanted_names(entry), album_list)
+        if chosen:
+            url = getattr(chosen, "share_url", None) or (
+                f"https://tidal.com/browse/album/{chosen.id}" if chosen.id else None
+            )
+            if url:
+                entry["tidal_url"] = url
+                entry["no_match"] = False
+                print(f"  [{i+1}/{len(albums)}] {query!r} -> {url}")
+                return True
+            entry["tidal_url"] = None
+            entry["no_match"] = True
+            print(f"  [{i+1}/{len(albums)}] {query!r} -> no URL")
+        else:
+            entry["tidal_url"] = None
+            entry["no_match"] = True
+            msg = "no results" if not album_list else "no matching result (album+artist)"
+            print(f"  [{i+1}/{len(albums)}] {query!r} -> {msg}")
+        return False
+
+    # Queries answered by an earlier run are scored from the cache without touching the network.
+    # Only searches that produced a match are cached, and a cached result that no longer
+    # matches the entry is searched again, so albums added to Tidal later still resolve.
+    # --force searches everything again but keeps the cache for queries it doesn't re-run.
+    cache = {} if args.refresh_cache else _load_search_cache()
+    # Entries still to search, grouped by query: duplicates share one Tidal request
+    misses: dict[str, list[tuple[int, dict]]] = {}
+    for i, entry, query in to_search:
+        cached = None if args.force else cache.get(query)
+        if cached:
+            cached_albums = [_album_from_cache(c) for c in cached]
+            if _best_candidate(_wanted_names(entry), cached_albums):
+                if apply_result(i, entry, query, cached_albums):
                     matched += 1
-                    print(f"  [{i+1}/{len(albums)}] {query!r} -> {url}")
-                else:
+                continue
+        misses.setdefault(query, []).append((i, entry))
+
+    limiter = RateLimiter(SEARCH_RATE)
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        futures = {
+            executor.submit(_search_albums, session, limiter, query): query
+            for query in misses
+        }
+        # Scoring, entry updates and cache writes happen here on the main thread;
+        # each entry sharing a query is scored against the same candidates
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                album_list = future.result()
+            except Exception as e:
+                for i, entry in misses[query]:
                     entry["tidal_url"] = None
                     entry["no_match"] = True
-                    print(f"  [{i+1}/{len(albums)}] {query!r} -> no URL")
+                    print(f"  [{i+1}/{len(albums)}] {query!r} -> error: {e}")
+                continue
+            query_matched = False
+            for i, entry in misses[query]:
+                if apply_result(i, entry, query, album_list):
+                    matched += 1
+                    query_matched = True
+            if query_matched:
+                cache[query] = [_album_to_cache(a) for a in album_list]
             else:
-                entry["tidal_url"] = None
-                entry["no_match"] = True
-                msg = "no results" if not album_list else "no matching result (album+artist)"
-                print(f"  [{i+1}/{len(albums)}] {query!r} -> {msg}")
-        except Exception as e:
-            entry["tidal_url"] = None
-            entry["no_match"] = True
-            print(f"  [{i+1}/{len(albums)}] {query!r} -> error: {e}")
-        time.sleep(SEARCH_DELAY)
+                cache.pop(query, None)
 
-    ALBUMS_FILE.write_text(json.dumps(albums, indent=2), encoding="utf-8")
-    print(f"\nResolved {matched}/{len(albums)} albums. Updated {ALBUMS_FILE}")
+    if misses:
+        write_json(SEARCH_CACHE_FILE, cache)
+    changed = write_json(ALBUMS_FILE, albums)
+    status = f"Updated {ALBUMS_FILE}" if changed else f"No changes to {ALBUMS_FILE}"
+    print(f"\nResolved {matched}/{len(albums)} albums. {status}")
 
 
 if __name__ == "__main__":
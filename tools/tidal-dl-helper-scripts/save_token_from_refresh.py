@@ -28,15 +28,18 @@ SCOPE = "user-library-read"
 load_dotenv(_PROJECT_DIR / ".env")
 CLIENT_ID = os.getenv("SPOTIPY_CLIENT_ID")
 CLIENT_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET")
+# Keep-alive session so repeated token refreshes reuse the TLS connection
+_SESSION = requests.Session()
 
 
 def refresh_access_token(refresh_token: str) -> dict:
     auth = requests.auth.HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
-    resp = requests.post(
+    resp = _SESSION.post(
         "https://accounts.spotify.com/api/token",
         data={"grant_type": "refresh_token", "refresh_token": refresh_token},
         auth=auth,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=30,
     )
     resp.raise_for_status()
     data = resp.json()
@@ -6,7 +6,8 @@ Run this script. It starts a local server and prints a URL. Open that URL
 in the browser where you're already logged into Spotify (e.g. open.spotify.com).
 After you click "Continue" / authorize, the redirect hits this server, we
 exchange the code for tokens, and save them to .spotify_cache so
-get_saved_albums.py works without opening a browser again.
+get_saved_albums.py works without opening a browser again. If .spotify_cache
+already holds a token, it is refreshed when expired instead of logging in again.
 
 Use this when the normal Spotipy flow fails (e.g. redirect URI / localhost
 issues). Your redirect_uri in .env must still match one in the Spotify app
@@ -20,11 +21,15 @@ from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 _PROJECT_DIR = Path(__file__).resolve().parent
 _CACHE_PATH = _PROJECT_DIR / ".spotify_cache"
 SCOPE = "user-library-read"
+_TOKEN_URL = "https://accounts.spotify.com/api/token"
+# Seconds to wait for the browser redirect before giving up
+_CALLBACK_TIMEOUT = 300
 
 # Load .env
 load_dotenv(_PROJECT_DIR / ".env")
@@ -46,23 +51,32 @@ def _clean_uri(uri: str | None) -> str:
 CLIENT_ID = os.getenv("SPOTIPY_CLIENT_ID")
 CLIENT_SECRET = os.getenv("SPOTIPY_CLIENT_SECRET")
 REDIRECT_URI = _clean_uri(os.getenv("SPOTIPY_REDIRECT_URI"))
-
-
-def get_authorize_url():
-    params = {
-        "client_id": CLIENT_ID,
-        "response_type": "code",
-        "redirect_uri": REDIRECT_URI,
-        "scope": SCOPE,
-    }
-    return "https://accounts.spotify.com/authorize?" + urllibparse.urlencode(params)
+# Where the callback server listens, parsed once from the redirect URI
+_REDIRECT = urllibparse.urlparse(REDIRECT_URI)
+_REDIRECT_HOST = _REDIRECT.hostname or "127.0.0.1"
+_REDIRECT_PORT = _REDIRECT.port
+_REDIRECT_PATH = _REDIRECT.path.rstrip("/")
+AUTHORIZE_URL = "https://accounts.spotify.com/authorize?" + urllibparse.urlencode({
+    "client_id": CLIENT_ID,
+    "response_type": "code",
+    "redirect_uri": REDIRECT_URI,
+    "scope": SCOPE,
+})
+# Keep-alive session so the code exchange and later refreshes reuse the TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+
+def _expires_at(expires_in: int) -> int:
+    """Expiry timestamp with a safety skew (5%, at least 60s) so tokens are refreshed early."""
+    return int(time.time()) + expires_in - max(60, expires_in // 20)
 
 
 def exchange_code_for_token(code: str) -> dict:
     """Exchange authorization code for access + refresh token."""
     auth = requests.auth.HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
-    resp = requests.post(
-        "https://accounts.spotify.com/api/token",
+    resp = _SESSION.post(
+        _TOKEN_URL,
         data={
             "grant_type": "authorization_code",
             "code": code,
@@ -70,22 +84,70 @@ def exchange_code_for_token(code: str) -> dict:
         },
         auth=auth,
         headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=30,
     )
     resp.raise_for_status()
     data = resp.json()
-    data["expires_at"] = int(time.time()) + data["expires_in"]
+    data["expires_at"] = _expires_at(data["expires_in"])
     data["scope"] = SCOPE
     return data
 
 
-def save_cache(token_info: dict) -> None:
-    _CACHE_PATH.write_text(json.dumps(token_info), encoding="utf-8")
+def refresh_access_token(token_info: dict) -> dict:
+    """
+    Get a new access token with the cached refresh token and save it.
+
+    Spotify may omit refresh_token from the response; the cached one is kept then.
+    """
+    auth = requests.auth.HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
+    resp = _SESSION.post(
+        _TOKEN_URL,
+        data={
+            "grant_type": "refresh_token",
+            "refresh_token": token_info["refresh_token"],
+        },
+        auth=auth,
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+        timeout=30,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    refresh_token = token_info["refresh_token"]
+    token_info = {**token_info, **data}
+    token_info["refresh_token"] = data.get("refresh_token") or refresh_token
+    token_info["expires_at"] = _expires_at(data["expires_in"])
+    save_cache(token_info)
+    return token_info
+
+
+def load_cache() -> dict | None:
+    """
+    Return the cached token info, or None if there is no usable cache (missing,
+    unreadable, or expired without a refresh token). An expired entry that has a
+    refresh token is returned as is; refresh it with refresh_access_token.
+    """
     try:
-        _CACHE_PATH.chmod(0o600)
-    except OSError:
-        pass
+        token_info = json.loads(_CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if time.time() >= token_info.get("expires_at", 0) and not token_info.get("refresh_token"):
+        return None
+    return token_info
 
 
+def save_cache(token_info: dict) -> None:
+    """Write the token cache (mode 0600) via a temp file + rename, so a crash never truncates it."""
+    tmp_path = _CACHE_PATH.with_name(_CACHE_PATH.name + ".tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(json.dumps(token_info).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, _CACHE_PATH)
+
+
+_RESPONSE_BODY = b"<html><body><p>You can close this tab and return to the terminal.</p></body></html>"
+
 # Server state
 auth_code: str | None = None
 server_error: str | None = None
@@ -95,18 +157,20 @@ class CallbackHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         global auth_code, server_error
         parsed = urllibparse.urlparse(self.path)
-        if parsed.path in ("/", "/callback", "/callback/"):
-            qs = urllibparse.parse_qs(parsed.query)
-            if "error" in qs:
-                server_error = qs["error"][0] + ": " + (qs.get("error_description", [""])[0])
-            elif "code" in qs:
-                auth_code = qs["code"][0]
+        qs = urllibparse.parse_qs(parsed.query) if parsed.path.rstrip("/") == _REDIRECT_PATH else {}
+        if "error" in qs:
+            server_error = qs["error"][0] + ": " + (qs.get("error_description", [""])[0])
+        elif "code" in qs:
+            auth_code = qs["code"][0]
+        else:
+            # Favicon probes, prefetches etc.: answer without ending the wait for the callback
+            self.send_response(204)
+            self.end_headers()
+            return
         self.send_response(200)
         self.send_header("Content-Type", "text/html; charset=utf-8")
         self.end_headers()
-        self.wfile.write(
-            b"<html><body><p>You can close this tab and return to the terminal.</p></body></html>"
-        )
+        self.wfile.write(_RESPONSE_BODY)
 
     def log_message(self, format, *args):
         pass
@@ -116,20 +180,34 @@ def main():
     if not CLIENT_ID or not CLIENT_SECRET:
         print("Set SPOTIPY_CLIENT_ID and SPOTIPY_CLIENT_SECRET in .env")
         return
+    token_info = load_cache()
+    # .spotify_cache is shared with spotify_auth.py, so it may hold a token for other scopes
+    if token_info is not None and SCOPE in token_info.get("scope", "").split():
+        # A cached token only needs the refresh grant, not another browser round trip
+        try:
+            if time.time() >= token_info.get("expires_at", 0):
+                refresh_access_token(token_info)
+            print(f"Token in {_CACHE_PATH} is valid. You can run: python get_saved_albums.py")
+            print("  (delete that file to log in again)")
+            return
+        except requests.RequestException as e:
+            print(f"Refreshing the cached token failed ({e}); logging in again.\n")
     print(f"Using redirect_uri: {REDIRECT_URI!r}")
     print("  ^ This must match EXACTLY one entry in Spotify Dashboard → Your App → Edit Settings → Redirect URIs")
     print("  (same scheme, host, port, path; no trailing slash)\n")
-    # Parse host/port from redirect URI (e.g. http://localhost:8888/callback -> 8888)
-    parsed = urllibparse.urlparse(REDIRECT_URI)
-    host = parsed.hostname or "127.0.0.1"
-    port = parsed.port or (8080 if "8080" in REDIRECT_URI else 8888)
+    if _REDIRECT_PORT is None:
+        print("SPOTIPY_REDIRECT_URI needs an explicit port, e.g. http://127.0.0.1:8888/callback")
+        return
     # Bind to 127.0.0.1 so we accept both 127.0.0.1 and localhost
-    bind_host = "127.0.0.1" if host in ("localhost", "127.0.0.1") else host
-    server = HTTPServer((bind_host, port), CallbackHandler)
-    url = get_authorize_url()
-    print(f"Open this URL in the browser where you're logged into Spotify:\n\n  {url}\n")
+    bind_host = "127.0.0.1" if _REDIRECT_HOST in ("localhost", "127.0.0.1") else _REDIRECT_HOST
+    server = HTTPServer((bind_host, _REDIRECT_PORT), CallbackHandler)
+    print(f"Open this URL in the browser where you're logged into Spotify:\n\n  {AUTHORIZE_URL}\n")
     print(f"Waiting for callback on {REDIRECT_URI} ...")
-    server.handle_request()
+    # Serve until the real callback arrives (the browser may send other requests first)
+    server.timeout = _CALLBACK_TIMEOUT
+    deadline = time.monotonic() + _CALLBACK_TIMEOUT
+    while auth_code is None and server_error is None and time.monotonic() < deadline:
+        server.handle_request()
     server.server_close()
     if server_error:
         print(f"Error from Spotify: {server_error}")